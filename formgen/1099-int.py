@@ -6,14 +6,27 @@
 
 This program populates a form 1099 for purposes of practing tax returns. Both
 taxable and tax-exempt interest can potentially be reported.
+
+USAGE
+
+    ./1099-int.py [-a]
+
+OPTIONS
+    -a, --all-copies    Fill Copies A, 1, B, 2 and C rather than only Copy B
 """
 
+import os
+import argparse
+
 from math import floor
 from random import randint
 
-from pypdf import PdfReader, PdfWriter
+from schema import makeSchema, resolve
+from template import loadTemplate, fillForm, formsDir
 
-writer = PdfWriter()
+# The blank form and the name given to filled copies of it
+blankForm = os.path.join(formsDir, 'f1099int.pdf')
+formName = '1099int'
 
 # Generate random amount of interest
 def _rdmInt():
@@ -33,15 +46,44 @@ defaultValues = {
         'RghtColumn[0].Box8[0].f2_16[0]': 0.00,                                 # Tax-exempt Interest
     }
 
-if __name__ == "__main__":
-    reader = PdfReader('forms/f1099int.pdf')
+# Logical names of the fields of a 1099-INT, which are also the record columns
+# read by the pipeline
+columns = {
+        'payer': 'LeftColumn[0].f2_1[0]',
+        'payer_tin': 'LeftColumn[0].f2_2[0]',
+        'recipient_tin': 'LeftColumn[0].f2_3[0]',
+        'recipient_name': 'LeftColumn[0].f2_4[0]',
+        'street': 'LeftColumn[0].f2_5[0]',
+        'city': 'LeftColumn[0].f2_6[0]',
+        'interest': 'RghtColumn[0].Box1[0].f2_9[0]',
+        'tax_exempt_interest': 'RghtColumn[0].Box8[0].f2_16[0]',
+        }
 
-    values = { f'topmostSubform[0].CopyB[0].{field}': value for field, value in defaultValues.items() }
-    values['topmostSubform[0].CopyB[0].RghtColumn[0].Box1[0].f2_9[0]'] = _rdmInt()
-    values['topmostSubform[0].CopyB[0].RghtColumn[0].Box8[0].f2_16[0]'] = _rdmInt()
+schema = makeSchema('topmostSubform[0].CopyB[0]', columns, defaultValues)
+
+# Every copy of the 1099-INT filled from the same values
+allCopies = makeSchema('topmostSubform[0].CopyB[0]', columns, defaultValues,
+                       [f'topmostSubform[0].Copy{c}[0]' for c in ['A', '1', '2', 'C']])
+
+def record(schema=schema):
+    """
+    record computes every field of one 1099-INT with random interest. Each
+    copy of `schema` is filled with the same interest.
+    """
+    return resolve(schema, { 'interest': _rdmInt(), 'tax_exempt_interest': _rdmInt() })
+
+def fromRecord(row, schema=schema):
+    """
+    fromRecord computes every field of one 1099-INT from a record whose keys
+    are `columns`. Empty and unknown columns are ignored.
+    """
+    return resolve(schema, { c: v for c, v in row.items() if v not in ('', None) })
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Populate a form 1099-INT with generated interest')
+    parser.add_argument('-a', '--all-copies', action='store_true', help='Fill every copy of the 1099-INT rather than only Copy B')
 
-    writer.append(reader)
-    writer.update_page_form_field_values(None, values, auto_regenerate=False)
+    args = parser.parse_args()
+    copies = allCopies if args.all_copies else schema
 
-    with open('filled-1099int.pdf', 'wb') as output:
-        writer.write(output)
+    fillForm(loadTemplate(blankForm, copies), record(copies), f'filled-{formName}.pdf')
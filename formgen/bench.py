@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+#coding:utf-8
+
+"""
+Benchmark Suite
+
+This program times the hot paths of the form generators: computing tax,
+withholding and taxable Social Security benefits, and filling each form end to
+end from its blank template, both rewritten in full and as an incremental
+update of the template, and merging filled forms into one PDF. Cases writing
+forms also report the bytes written per record. Parsing publications is timed
+by pubscraper/bench.py.
+
+Every case runs over the same number of records, from one up to millions.
+Results are written as JSON lines, one object per case, and a later run given
+them as its baseline reports how much each case has sped up or slowed down.
+Fill and merge cases are skipped when the blank form is not in forms/.
+
+With --sweep the float and exact integer-cents paths are also checked against
+`_oracle` over a sweep of incomes. The float path is checked to within a
+millionth of a dollar of the oracle, and the cents path to be the oracle
+truncated to whole cents. The number of incomes at which truncating the float
+path lands on a different cent than the exact path is also reported.
+
+USAGE
+
+    taxstuff bench [OPTIONS]
+
+OPTIONS
+    -n, --records       The number of records each case runs over. Default is 10000
+    -k, --cases         Only run the cases whose names contain one of these
+    -o, --out           Write the results to OUT as JSON lines
+    -b, --baseline      Compare against the results of an earlier run
+    -t, --tolerance     The slowdown reported as a regression. Default is 0.1 (10%)
+    --sweep             Check the float and cents paths against the oracle
+    -m, --max           The highest income of the sweep in dollars. Default is 800000
+    -s, --step          The step between incomes of the sweep in cents. Default is 100
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+
+from io import BytesIO
+
+import numpy as np
+
+from taxcredits.tax_schedule import (_oracle, _tax_schedule, figureTax, figureTaxBatch, figureTaxCents,
+                                     figureTaxCentsBatch, marginalRate, effectiveRate, incomeForTax,
+                                     figureTaxStacked, figureTaxCentsStacked, compiledStack, compiledCentsStack,
+                                     rateSchedule, compiledSchedule, compiledCentsSchedule)
+from income.income import SSWorksheet, filingStatuses, taxable_ss, taxable_ss_batch
+
+from w2 import _fica, _fica_cents, _fica_cents_batch, _trunc, _wage_and_wh, withholding
+from parallel import generators, loadGenerator
+from template import loadTemplate, formBytes, mergeForms
+
+def _taxCases(cents):
+    dollars = [c / 100 for c in cents]
+    array = np.asarray(dollars)
+    centsarray = np.asarray(cents, dtype=np.int64)
+
+    # Retirees with benefits and other income both drawn from the wages
+    statuses = [i % 5 for i in range(len(cents))]
+    worksheets = [SSWorksheet(d / 10, d / 5, status=filingStatuses[s]) for d, s in zip(dollars, statuses)]
+
+    (schedule, rates) = rateSchedule('federal', 2025)
+    floattable = compiledSchedule('federal', 2025)
+    centstable = compiledCentsSchedule('federal', 2025)
+
+    return {
+            'tax/figureTax': (lambda w: figureTax(w, floattable), dollars),
+            'tax/_tax_schedule': (lambda w: _tax_schedule(w, floattable), dollars),
+            'tax/_oracle': (lambda w: _oracle(w, schedule, rates), dollars),
+            'tax/figureTaxCents': (lambda c: figureTaxCents(c, centstable), cents),
+            'tax/figureTaxBatch': (lambda a: figureTaxBatch(a, floattable), [array]),
+            'tax/figureTaxCentsBatch': (lambda a: figureTaxCentsBatch(a, centstable), [centsarray]),
+            'tax/figureTaxStacked': (lambda a: figureTaxStacked(a, compiledStack(local=0.032)), [array]),
+            'tax/figureTaxCentsStacked': (lambda a: figureTaxCentsStacked(a, compiledCentsStack(local=0.032)), [centsarray]),
+            'tax/marginalRate': (lambda a: marginalRate(a, floattable), [array]),
+            'tax/effectiveRate': (lambda a: effectiveRate(a, floattable), [array]),
+            'tax/incomeForTax': (lambda a: incomeForTax(a / 5, floattable), [array]),
+            'fica/_fica': (lambda w: [_trunc(t) for t in _fica(w)], dollars),
+            'fica/_fica_cents': (_fica_cents, cents),
+            'fica/_fica_cents_batch': (_fica_cents_batch, [centsarray]),
+            'w2/_wage_and_wh': (_wage_and_wh, dollars),
+            'w2/withholding': (withholding, [array]),
+            'income/taxable_ss': (taxable_ss, worksheets),
+            'income/taxable_ss_batch': (lambda a: taxable_ss_batch(a / 10, a / 5, status=statuses), [array]),
+            }
+
+# Filling a form is set up only if its case is run, as it parses the template
+def _fillCase(form, n, incremental=False):
+    def setup():
+        generator = loadGenerator(form)
+        template = loadTemplate(generator.blankForm, generator.schema, incremental)
+
+        return (lambda _: formBytes(template, generator.record()), range(n), n)
+
+    return setup
+
+# Merging times filling every form as well, so its size is comparable to fill/FORM
+def _mergeCase(form, n):
+    def setup():
+        generator = loadGenerator(form)
+        template = loadTemplate(generator.blankForm, generator.schema)
+
+        def merge(_):
+            merged = BytesIO()
+            mergeForms((formBytes(template, generator.record()) for _ in range(n)), merged)
+
+            return merged.getvalue()
+
+        return (merge, [None], n)
+
+    return setup
+
+def cases(n):
+    """
+    cases lists the benchmark cases over `n` records.
+
+    Output
+        A dictionary mapping the name of each case to a function setting it
+        up. Setting up a case returns the function timed, the arguments it is
+        called with one at a time and the number of records they make up.
+    """
+    rng = random.Random(0)
+    cents = [rng.randint(0, 751600_00) for _ in range(n)]
+
+    taxCases = None
+    def taxCase(name):
+        def setup():
+            nonlocal taxCases
+            taxCases = taxCases or _taxCases(cents)
+            (fn, args) = taxCases[name]
+
+            return (fn, args, n)
+
+        return setup
+
+    names = ['tax/figureTax', 'tax/_tax_schedule', 'tax/_oracle', 'tax/figureTaxCents', 'tax/figureTaxBatch',
+             'tax/figureTaxCentsBatch', 'tax/figureTaxStacked', 'tax/figureTaxCentsStacked',
+             'tax/marginalRate', 'tax/effectiveRate', 'tax/incomeForTax',
+             'fica/_fica', 'fica/_fica_cents', 'fica/_fica_cents_batch',
+             'w2/_wage_and_wh', 'w2/withholding', 'income/taxable_ss', 'income/taxable_ss_batch']
+
+    found = { name: taxCase(name) for name in names }
+
+    for form in generators:
+        if os.path.exists(loadGenerator(form).blankForm):
+            found[f'fill/{form}'] = _fillCase(form, n)
+            found[f'fill/{form}/incremental'] = _fillCase(form, n, incremental=True)
+            found[f'merge/{form}'] = _mergeCase(form, n)
+        else:
+            print(f'skipping fill/{form} and merge/{form}: no blank form', file=sys.stderr)
+
+    return found
+
+def run(name, setup):
+    """
+    run sets up the case `name` and times it over every one of its arguments.
+
+    Output
+        The result of the case, as written to the JSON lines output. Cases
+        returning bytes, such as filled forms, also report their size
+    """
+    (fn, args, records) = setup()
+
+    # Seed generators so every run fills the same forms
+    random.seed(0)
+
+    size = 0
+    start = time.perf_counter()
+    for a in args:
+        out = fn(a)
+
+        if isinstance(out, bytes):
+            size += len(out)
+    seconds = time.perf_counter() - start
+
+    result = {
+            'case': name,
+            'records': records,
+            'seconds': seconds,
+            'us_per_record': seconds / records * 1e6,
+            'python': platform.python_version(),
+            }
+
+    if size:
+        result['bytes_per_record'] = size / records
+
+    return result
+
+def compare(results, baseline, tolerance=0.1):
+    """
+    compare reports the change of each result relative to the result of the
+    same case in `baseline`.
+
+    Output
+        The names of the cases slower than their baseline by more than
+        `tolerance`
+    """
+    previous = { r['case']: r for r in baseline }
+    regressions = []
+
+    for r in results:
+        if r['case'] not in previous:
+            continue
+
+        ratio = r['us_per_record'] / previous[r['case']]['us_per_record']
+        flag = ''
+
+        if ratio > 1 + tolerance:
+            regressions.append(r['case'])
+            flag = '\tREGRESSION'
+
+        print(f'{r["case"]:<48}{ratio:8.2f}x baseline{flag}')
+
+    return regressions
+
+def sweep(top, step):
+    """
+    sweep checks the float and cents paths against `_oracle` at every income
+    from zero to `top` dollars in steps of `step` cents.
+
+    Output
+        A tuple of the incomes where the float path disagrees with the oracle,
+        the incomes where the cents path does, and the number of incomes where
+        the truncated float path and the cents path land on different cents
+    """
+    floatErrors = []
+    centsErrors = []
+    differ = 0
+
+    (schedule, rates) = rateSchedule('federal', 2025)
+    floattable = compiledSchedule('federal', 2025)
+    taxtable = compiledCentsSchedule('federal', 2025)
+
+    for cents in range(0, top * 100 + 1, step):
+        income = cents / 100
+        oracle = _oracle(income, schedule, rates)
+
+        f = figureTax(income, floattable)
+        c = figureTaxCents(cents, taxtable)
+
+        if abs(f - oracle) > 1e-6:
+            floatErrors.append(income)
+
+        # The oracle is a float, so allow it to fall a hair either side of a cent
+        if not (-1e-6 <= oracle * 100 - c < 1 + 1e-6):
+            centsErrors.append(income)
+
+        if round(_trunc(f) * 100) != c:
+            differ += 1
+
+    return (floatErrors, centsErrors, differ)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark tax computation and form filling')
+    parser.add_argument('-n', '--records', type=int, default=10_000, help='The number of records each case runs over. Default is 10000')
+    parser.add_argument('-k', '--cases', nargs='+', help='Only run the cases whose names contain one of these')
+    parser.add_argument('-o', '--out', help='Write the results to OUT as JSON lines')
+    parser.add_argument('-b', '--baseline', help='Compare against the results of an earlier run')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.1, help='The slowdown reported as a regression. Default is 0.1 (10%%)')
+    parser.add_argument('--sweep', action='store_true', help='Check the float and cents paths against the oracle')
+    parser.add_argument('-m', '--max', type=int, default=800_000, help='The highest income of the sweep in dollars. Default is 800000')
+    parser.add_argument('-s', '--step', type=int, default=100, help='The step between incomes of the sweep in cents. Default is 100')
+
+    args = parser.parse_args()
+
+    results = []
+    for name, setup in cases(args.records).items():
+        if args.cases and not any(k in name for k in args.cases):
+            continue
+
+        result = run(name, setup)
+        results.append(result)
+
+        size = f'{result["bytes_per_record"] / 1e3:12.1f} kB/record' if 'bytes_per_record' in result else ''
+        print(f'{name:<48}{result["seconds"]:10.3f} s{result["us_per_record"]:12.3f} us/record{size}')
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            for r in results:
+                f.write(json.dumps(r) + '\n')
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = [json.loads(line) for line in f if line.strip()]
+
+        regressions = compare(results, baseline, args.tolerance)
+
+    if args.sweep:
+        (floatErrors, centsErrors, differ) = sweep(args.max, args.step)
+
+        print(f'{len(range(0, args.max * 100 + 1, args.step))} incomes swept')
+        print(f'float path disagrees with the oracle at {len(floatErrors)} incomes {floatErrors[:5]}')
+        print(f'cents path disagrees with the oracle at {len(centsErrors)} incomes {centsErrors[:5]}')
+        print(f'truncated float and cents paths differ by a cent at {differ} incomes')
+
+    # Regressions fail the run only once the sweep has been reported too
+    if regressions:
+        sys.exit(1)
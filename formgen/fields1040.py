@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+#coding:utf-8
+
+"""
+1040 Fields
+
+The filing statuses, spouse, dependents and field names of a 1040, shared by
+the 1040 generator and the synthetic population. Nothing here reads the blank
+form, so the population can build records without importing pypdf.
+"""
+
+# Filing statuses in the order of the checkboxes of the 1040
+filingStatuses = ['S', 'HOH', 'MFJ', 'MFS', 'QSS']
+
+# The fields of each row of the Dependents table: its name, SSN, relationship
+# and the CTC and ODC checkboxes
+dependentFields = [
+        {'name': 'Table_Dependents[0].Row1[0].f1_20[0]',
+         'ssn': 'Table_Dependents[0].Row1[0].f1_21[0]',
+         'relationship': 'Table_Dependents[0].Row1[0].f1_22[0]',
+         'ctc': 'Table_Dependents[0].Row1[0].c1_14[0]',
+         'odc': 'Table_Dependents[0].Row1[0].c1_15[0]'},
+
+        {'name': 'Table_Dependents[0].Row2[0].f1_23[0]',
+         'ssn': 'Table_Dependents[0].Row2[0].f1_24[0]',
+         'relationship': 'Table_Dependents[0].Row2[0].f1_25[0]',
+         'ctc': 'Table_Dependents[0].Row2[0].c1_16[0]',
+         'odc': 'Table_Dependents[0].Row2[0].c1_17[0]'},
+
+        {'name': 'Table_Dependents[0].Row3[0].f1_26[0]',
+         'ssn': 'Table_Dependents[0].Row3[0].f1_27[0]',
+         'relationship': 'Table_Dependents[0].Row3[0].f1_28[0]',
+         'ctc': 'Table_Dependents[0].Row3[0].c1_18[0]',
+         'odc': 'Table_Dependents[0].Row3[0].c1_19[0]'},
+        ]
+
+# The dependent filled into each row of the Dependents table
+dependentRows = [
+        {'name': 'Jake Taxpayer', 'ssn': '123-45-6791', 'relationship': 'Child', 'ctc': '/1', 'odc': ''},
+        {'name': 'Jacquelyn Taxpayer', 'ssn': '123-45-6792', 'relationship': 'Child', 'ctc': '', 'odc': '/1'},
+        {'name': 'Jessie Taxpayer', 'ssn': '123-45-6793', 'relationship': 'Child', 'ctc': '/1', 'odc': ''},
+        ]
+
+# The spouse of a taxpayer filing jointly
+spouseInfo = {
+        'spouse_first_name': 'Jane',
+        'spouse_last_name': 'Taxpayer',
+        'spouse_ssn': '123-45-6790',
+        }
+
+# Logical names of the fields of a 1040, which are also the record columns read
+# by the pipeline. Dependents are numbered by their row in the Dependents
+# table, starting from 0.
+columns = {
+        'first_name': 'f1_04[0]',
+        'last_name': 'f1_05[0]',
+        'ssn': 'f1_06[0]',
+        'spouse_first_name': 'f1_07[0]',
+        'spouse_last_name': 'f1_08[0]',
+        'spouse_ssn': 'f1_09[0]',
+        'street': 'Address_ReadOrder[0].f1_10[0]',
+        'apt': 'Address_ReadOrder[0].f1_11[0]',
+        'city': 'Address_ReadOrder[0].f1_12[0]',
+        'state': 'Address_ReadOrder[0].f1_13[0]',
+        'zip': 'Address_ReadOrder[0].f1_14[0]',
+        'election_campaign': 'c1_1[0]',
+        'spouse_election_campaign': 'c1_2[0]',
+        'status_single': 'FilingStatus_ReadOrder[0].c1_3[0]',
+        'status_hoh': 'c1_3[0]',
+        'status_mfj': 'FilingStatus_ReadOrder[0].c1_3[1]',
+        'status_mfs': 'FilingStatus_ReadOrder[0].c1_3[2]',
+        'status_qss': 'c1_3[1]',
+        'mfs_spouse': 'f1_18[0]',
+        'over_65': 'c1_9[0]',
+        'blind': 'c1_10[0]',
+        'spouse_over_65': 'c1_11[0]',
+        'spouse_blind': 'c1_12[0]',
+        } | {
+        f'dependent[{i}].{column}': field
+        for i, row in enumerate(dependentFields)
+        for column, field in row.items()
+        }
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+#coding:utf-8
+
+"""
+Parallel Form Generator
+
+This program generates a batch of forms from any of the form generators across
+a pool of worker processes. Each worker parses the blank form once and fills
+every record it is handed from that template.
+
+Every record is generated from its own seed, derived from the batch seed and
+the index of the record, so the same record comes out identical no matter how
+many workers there are or which of them fills it.
+
+With --merge the workers hand each filled form back rather than writing it, and
+every form is merged in order into the single PDF OUT. The pool hands back
+chunks as soon as they are filled, whether or not the merge has caught up, and
+the merged document holds every form until it is written, so memory grows with
+COUNT. Merge batches that fit in memory, or leave --merge off.
+
+USAGE
+
+    ./parallel.py [OPTIONS] FORM COUNT
+
+    FORM is one of w-2, 1099-int or 1040
+
+OPTIONS
+    -j, --jobs          The number of worker processes. Default is the number of CPUs
+    -s, --seed          The seed of the batch. Default is 0
+    -a, --all-copies    Fill every copy of the W-2 or 1099-INT rather than only Copy B
+    -u, --incremental   Write each form as an incremental update of the blank form
+    -m, --merge         Write every form into the single PDF OUT
+    -o, --out           The directory to write the forms to
+    --profile           Print the time spent in each stage when done
+    --trace             Also write the stages, counters and a trace of every
+                        stage to TRACE
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import importlib.util
+
+from concurrent.futures import ProcessPoolExecutor
+
+from taxstuff import instrument
+
+from template import loadTemplate, fillForm, formBytes, mergeForms
+
+# The script implementing each form generator
+generators = {
+        'w-2': 'w2.py',
+        '1099-int': '1099-int.py',
+        '1040': 'basic-info.py',
+        }
+
+# The generator, schema and template of the current worker process
+_generator = None
+_schema = None
+_template = None
+
+def loadGenerator(form):
+    """
+    loadGenerator imports the generator script of `form`. Scripts are loaded by
+    path as not all of their names are valid module names.
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), generators[form])
+
+    spec = importlib.util.spec_from_file_location(f'formgen_{form.replace("-", "")}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+def copySchema(generator, allCopies=False):
+    """
+    copySchema picks the schema of `generator` filling either its default copy
+    or, with `allCopies`, every copy of the form.
+
+    Raises
+        - ValueError if `allCopies` is set and the form has only one copy
+    """
+    if not allCopies:
+        return generator.schema
+
+    if not hasattr(generator, 'allCopies'):
+        raise ValueError(f'{generator.formName} has only one copy')
+
+    return generator.allCopies
+
+# `trace` is None unless the parent is collecting stats, in which case the worker
+# collects its own and hands them back with each task
+def _init(form, allCopies, incremental, trace):
+    global _generator, _schema, _template
+
+    if trace is not None:
+        instrument.enable(trace)
+
+    _generator = loadGenerator(form)
+    _schema = copySchema(_generator, allCopies)
+    _template = loadTemplate(_generator.blankForm, _schema, incremental)
+
+def _generate(task):
+    (seed, indices, out) = task
+
+    for i in indices:
+        random.seed(f'{seed}:{i}')
+        fillForm(_template, _generator.record(schema=_schema), f'{out}/{_generator.formName}-{i:06}.pdf')
+
+    return (len(indices), instrument.collect())
+
+def _generateBytes(task):
+    (seed, indices, _) = task
+
+    forms = []
+    for i in indices:
+        random.seed(f'{seed}:{i}')
+        forms.append(formBytes(_template, _generator.record(schema=_schema)))
+
+    return (forms, instrument.collect())
+
+def generate(form, count, out, jobs=None, seed=0, chunksize=100, allCopies=False, incremental=False, merge=False):
+    """
+    generate fills `count` forms of kind `form` across `jobs` worker processes,
+    writing each to its own file under `out`, or merging them all into the
+    single PDF `out`.
+
+    Input
+        form (string): The kind of form, one of the keys of `generators`
+        count (int): The number of forms to generate
+        out (string): The output directory, or the merged PDF with `merge`
+        jobs (int): The number of worker processes. Default is the number of CPUs
+        seed (int): The seed of the batch
+        chunksize (int): The number of records handed to a worker at a time
+        allCopies (bool): Fill every copy of the form rather than only one
+        incremental (bool): Write each form as an incremental update of the
+        blank form
+        merge (bool): Write every form into the single PDF `out`
+
+    Output
+        The number of forms written
+    """
+    if not merge:
+        os.makedirs(out, exist_ok=True)
+
+    tasks = ((seed, range(i, min(i + chunksize, count)), out) for i in range(0, count, chunksize))
+
+    stats = instrument.stats()
+    trace = None if stats is None else stats.events is not None
+
+    n = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(jobs, initializer=_init, initargs=(form, allCopies, incremental, trace)) as pool:
+        if merge:
+            def forms():
+                nonlocal n
+                for (chunk, workerStats) in pool.map(_generateBytes, tasks):
+                    if workerStats is not None:
+                        stats.merge(workerStats)
+
+                    yield from chunk
+                    n += len(chunk)
+                    print(f'{n} forms\t{n / (time.perf_counter() - start):.1f} forms/s', file=sys.stderr)
+
+            return mergeForms(forms(), out)
+
+        for (done, workerStats) in pool.map(_generate, tasks):
+            if workerStats is not None:
+                stats.merge(workerStats)
+
+            n += done
+            print(f'{n} forms\t{n / (time.perf_counter() - start):.1f} forms/s', file=sys.stderr)
+
+    return n
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a batch of forms across worker processes')
+    parser.add_argument('form', choices=generators.keys())
+    parser.add_argument('count', type=int)
+    parser.add_argument('-j', '--jobs', type=int, help='The number of worker processes. Default is the number of CPUs')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='The seed of the batch. Default is 0')
+    parser.add_argument('-a', '--all-copies', action='store_true', help='Fill every copy of the W-2 or 1099-INT rather than only Copy B')
+    parser.add_argument('-u', '--incremental', action='store_true', help='Write each form as an incremental update of the blank form')
+    parser.add_argument('-m', '--merge', action='store_true', help='Write every form into the single PDF OUT')
+    parser.add_argument('-o', '--out', default='filled', help='The directory to write the forms to')
+    parser.add_argument('--profile', action='store_true', help='Print the time spent in each stage when done')
+    parser.add_argument('--trace', help='Also write the stages, counters and a trace of every stage to TRACE')
+
+    args = parser.parse_args()
+
+    if args.profile or args.trace:
+        instrument.enable(trace=bool(args.trace))
+
+    generate(args.form, args.count, args.out, args.jobs, args.seed, allCopies=args.all_copies, incremental=args.incremental, merge=args.merge)
+
+    if instrument.stats() is not None:
+        instrument.report(instrument.stats(), args.trace)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+#coding:utf-8
+
+"""
+Record Pipeline
+
+This program fills forms from taxpayer records stored in a CSV or JSON lines
+file. Records are read one at a time and each filled form is written before
+the next record is read, so memory use does not grow with the size of the
+input. A .npz population is read a block of taxpayers at a time for the same
+reason. With --merge every form is instead held until the end and written
+into one PDF, so memory grows with the input.
+
+The columns of each record are the keys of the `columns` dictionary of the
+form generator, e.g. `wages` or `fed_wh` for the W-2. Columns a record leaves
+out keep the generator's default values.
+
+USAGE
+
+    ./pipeline.py [OPTIONS] FORM INPUT
+
+    FORM is one of w-2, 1099-int or 1040
+    INPUT is a .csv file with a header row, a .jsonl file of JSON objects, or a
+    .npz population written by population.py
+
+OPTIONS
+    -a, --all-copies    Fill every copy of the W-2 or 1099-INT rather than only Copy B
+    -u, --incremental   Write each form as an incremental update of the blank form
+    -m, --merge         Write every form into the single PDF OUT
+    -o, --out           The directory to write the forms to
+    --profile           Print the time spent in each stage when done
+    --trace             Also write the stages, counters and a trace of every
+                        stage to TRACE
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+
+from taxstuff import instrument
+
+from template import loadTemplate, fillForm, formBytes, mergeForms
+from parallel import generators, loadGenerator, copySchema
+from population import records, loadBlocks
+
+def readRecords(path):
+    """
+    readRecords lazily yields each record of the CSV or JSON lines file at
+    `path` as a dictionary. The format is chosen by the file extension.
+    """
+    if path.endswith('.npz'):
+        yield from records(loadBlocks(path))
+        return
+
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def fillRecords(form, records, out, every=1000, allCopies=False, incremental=False, merge=False):
+    """
+    fillRecords fills one form of kind `form` per record in `records` and
+    writes it under `out` as soon as it is filled, or merges them all into the
+    single PDF `out`.
+
+    Input
+        form (string): The kind of form, one of the keys of `generators`
+        records (Iterable(dict)): The records to fill
+        out (string): The output directory, or the merged PDF with `merge`
+        allCopies (bool): Fill every copy of the form rather than only one
+        incremental (bool): Write each form as an incremental update of the
+        blank form
+        merge (bool): Write every form into the single PDF `out`
+
+    Output
+        The number of forms written
+    """
+    generator = loadGenerator(form)
+    schema = copySchema(generator, allCopies)
+    template = loadTemplate(generator.blankForm, schema, incremental)
+    start = time.perf_counter()
+
+    def progress(n):
+        if n % every == 0:
+            print(f'{n} forms\t{n / (time.perf_counter() - start):.1f} forms/s', file=sys.stderr)
+
+    if merge:
+        def forms():
+            for n, row in enumerate(records, 1):
+                yield formBytes(template, generator.fromRecord(row, schema))
+                progress(n)
+
+        return mergeForms(forms(), out)
+
+    os.makedirs(out, exist_ok=True)
+
+    n = 0
+    for n, row in enumerate(records, 1):
+        fillForm(template, generator.fromRecord(row, schema), f'{out}/{generator.formName}-{n:06}.pdf')
+        progress(n)
+
+    return n
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fill forms from a CSV or JSON lines file of taxpayer records')
+    parser.add_argument('form', choices=generators.keys())
+    parser.add_argument('input')
+    parser.add_argument('-a', '--all-copies', action='store_true', help='Fill every copy of the W-2 or 1099-INT rather than only Copy B')
+    parser.add_argument('-u', '--incremental', action='store_true', help='Write each form as an incremental update of the blank form')
+    parser.add_argument('-m', '--merge', action='store_true', help='Write every form into the single PDF OUT')
+    parser.add_argument('-o', '--out', default='filled', help='The directory to write the forms to')
+
+    parser.add_argument('--profile', action='store_true', help='Print the time spent in each stage when done')
+    parser.add_argument('--trace', help='Also write the stages, counters and a trace of every stage to TRACE')
+
+    args = parser.parse_args()
+
+    if args.profile or args.trace:
+        instrument.enable(trace=bool(args.trace))
+
+    fillRecords(args.form, readRecords(args.input), args.out, allCopies=args.all_copies, incremental=args.incremental, merge=args.merge)
+
+    if instrument.stats() is not None:
+        instrument.report(instrument.stats(), args.trace)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+#coding:utf-8
+
+"""
+Synthetic Population
+
+This program generates a population of synthetic taxpayers as columns: the
+filing status, dependents, spouse, wages and interest of each taxpayer are held
+in one numpy array apiece, sampled all at once rather than a taxpayer at a time.
+
+Taxpayers are consistent with their filing status as the 1040 generator draws
+them: heads of household and qualifying surviving spouses have at least one
+dependent, and only joint filers have a spouse on the return.
+
+The population is cut into fixed blocks of taxpayers, and each column of each
+block is drawn from its own generator seeded by the seed, the block and the
+column. Taxpayer i is therefore the same however the population is sharded,
+and a worker can generate its shard without generating any other.
+
+USAGE
+
+    ./population.py [OPTIONS] COUNT
+
+OPTIONS
+    -s, --seed      The seed of the population. Default is 0
+    --shard         Only generate shard K of N, e.g. --shard 0 4
+    -o, --out       Write the population to OUT, as columns if it ends in .npz
+                    or as records the pipeline reads if it ends in .csv or
+                    .jsonl. Default is population.npz
+"""
+
+import csv
+import json
+import zipfile
+import argparse
+
+from contextlib import ExitStack
+
+import numpy as np
+
+from fields1040 import filingStatuses, dependentRows, spouseInfo, columns as formColumns
+
+# The number of taxpayers drawn from the same generators
+blockSize = 1 << 16
+
+# The independent stream of random numbers each column is drawn from. New
+# streams must be appended so existing columns keep their values.
+streams = ['filing_status', 'dependents', 'spouse', 'wages', 'interest', 'retirement']
+
+# The columns of records written as CSV, beyond those of the 1040
+_recordColumns = ['filing_status', 'wages', 'interest', 'tax_exempt_interest', 'retirement']
+
+# Indices into `filingStatuses`
+(_S, _HOH, _MFJ, _MFS, _QSS) = range(5)
+
+def _block(seed, block):
+    seeds = np.random.SeedSequence(seed, spawn_key=(block,)).spawn(len(streams))
+    rng = { name: np.random.default_rng(s) for name, s in zip(streams, seeds) }
+
+    status = rng['filing_status'].integers(0, 5, blockSize, dtype=np.int8)
+
+    # Heads of household and qualifying surviving spouses claim one to three
+    # dependents, everyone else up to three
+    needs = (status == _HOH) | (status == _QSS)
+    dependents = rng['dependents'].integers(needs.astype(np.int8), 4, dtype=np.int8)
+
+    spouse = rng['spouse'].random((3, blockSize)) < 0.5
+    spouse &= status == _MFJ
+
+    wages = rng['wages'].integers(600_00, 751600_00, blockSize, endpoint=True)
+    interest = rng['interest'].integers(0, 1_000_000, (2, blockSize), endpoint=True)
+
+    return {
+        'filing_status': status,
+        'dependents': dependents,
+        'spouse_over_65': spouse[0],
+        'spouse_blind': spouse[1],
+        'spouse_election_campaign': spouse[2],
+        'wages': wages,
+        'interest': interest[0],
+        'tax_exempt_interest': interest[1],
+        'retirement': rng['retirement'].random(blockSize) < 0.5,
+        }
+
+def population(stop, seed=0, start=0):
+    """
+    population generates taxpayers `start` up to `stop` of the population of
+    `seed`.
+
+    Input
+        stop (int): One past the last taxpayer
+        seed (int): The seed of the population
+        start (int): The first taxpayer
+
+    Output
+        A dictionary mapping each column to an array of its value for each
+        taxpayer. `filing_status` indexes `filingStatuses` of the 1040,
+        `wages`, `interest` and `tax_exempt_interest` are in cents
+        and the spouse and retirement columns are booleans.
+
+    >>> whole = population(100_000, seed=7)
+    >>> part = population(70_000, seed=7, start=60_000)
+    >>> all((whole[c][60_000:70_000] == part[c]).all() for c in whole)
+    True
+
+    >>> p = population(10_000)
+    >>> int(p['dependents'][p['filing_status'] == _HOH].min())
+    1
+    """
+    first = start // blockSize
+    blocks = [_block(seed, b) for b in range(first, max(stop - 1, start) // blockSize + 1)]
+    offset = first * blockSize
+
+    return { c: np.concatenate([b[c] for b in blocks])[start - offset:stop - offset] for c in blocks[0] }
+
+def shard(count, shards, k):
+    """
+    shard returns the range of taxpayers of shard `k` when `count` taxpayers
+    are split evenly into `shards` shards.
+
+    >>> [shard(10, 3, k) for k in range(3)]
+    [range(0, 4), range(4, 7), range(7, 10)]
+    """
+    (size, extra) = divmod(count, shards)
+    start = k * size + min(k, extra)
+
+    return range(start, start + size + (k < extra))
+
+def blocks(columns):
+    """
+    blocks cuts `columns` into blocks of at most `blockSize` taxpayers.
+    """
+    for start in range(0, len(columns['filing_status']), blockSize):
+        yield { c: a[start:start + blockSize] for c, a in columns.items() }
+
+def records(columnBlocks):
+    """
+    records yields each taxpayer of `columnBlocks`, as cut by `blocks` or read
+    by `loadBlocks`, as a record of the pipeline. Each record holds the columns
+    read by the W-2, 1099-INT and 1040 generators, so the same population fills
+    every form. Only one block is held as Python objects at a time.
+    """
+    onoff = lambda flag: '/1' if flag else '/Off'
+
+    names = ['filing_status', 'dependents', 'spouse_over_65', 'spouse_blind', 'spouse_election_campaign',
+             'wages', 'interest', 'tax_exempt_interest', 'retirement']
+
+    for block in columnBlocks:
+        values = (block[c].tolist() for c in names)
+
+        for (status, deps, over65, blind, campaign, wages, interest, exempt, retirement) in zip(*values):
+            row = {
+                'filing_status': filingStatuses[status],
+                'wages': wages / 100,
+                'interest': interest / 100,
+                'tax_exempt_interest': exempt / 100,
+                'retirement': onoff(retirement),
+                }
+
+            if status == _MFJ:
+                row |= spouseInfo | {
+                    'spouse_over_65': onoff(over65),
+                    'spouse_blind': onoff(blind),
+                    'spouse_election_campaign': onoff(campaign),
+                    }
+            elif status == _MFS:
+                row['mfs_spouse'] = 'Jane Taxpayer'
+
+            for i, d in enumerate(dependentRows[:deps]):
+                row |= { f'dependent[{i}].{column}': value for column, value in d.items() }
+
+            yield row
+
+def save(columns, path):
+    """
+    save writes `columns` to `path`, as columns if it ends in .npz or as
+    records if it ends in .csv or .jsonl.
+    """
+    if path.endswith('.npz'):
+        np.savez(path, **columns)
+    elif path.endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, _recordColumns + list(formColumns))
+            writer.writeheader()
+            writer.writerows(records(blocks(columns)))
+    else:
+        with open(path, 'w') as f:
+            for row in records(blocks(columns)):
+                f.write(json.dumps(row) + '\n')
+
+def load(path):
+    """
+    load reads the columns saved to the .npz file at `path`.
+    """
+    with np.load(path) as f:
+        return dict(f)
+
+def loadBlocks(path):
+    """
+    loadBlocks reads the columns saved to the .npz file at `path` a block of
+    `blockSize` taxpayers at a time, so that however large the population only
+    one block of each column is in memory.
+
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'population.npz')
+    >>> whole = population(100_000, seed=3)
+    >>> save(whole, path)
+    >>> [len(b['wages']) for b in loadBlocks(path)]
+    [65536, 34464]
+    >>> all((np.concatenate([b[c] for b in loadBlocks(path)]) == whole[c]).all() for c in whole)
+    True
+    """
+    with zipfile.ZipFile(path) as z, ExitStack() as stack:
+        # Each column is an .npy member read as a stream past its header
+        members = {}
+        for info in z.infolist():
+            member = stack.enter_context(z.open(info))
+            version = np.lib.format.read_magic(member)
+            readHeader = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            (shape, _, dtype) = readHeader(member)
+
+            members[info.filename.removesuffix('.npy')] = (member, shape[0], dtype)
+
+        count = min(n for (_, n, _) in members.values())
+
+        for start in range(0, count, blockSize):
+            n = min(blockSize, count - start)
+
+            yield { c: np.frombuffer(member.read(n * dtype.itemsize), dtype) for c, (member, _, dtype) in members.items() }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a population of synthetic taxpayers')
+    parser.add_argument('count', type=int)
+    parser.add_argument('-s', '--seed', type=int, default=0, help='The seed of the population. Default is 0')
+    parser.add_argument('--shard', type=int, nargs=2, metavar=('K', 'N'), help='Only generate shard K of N')
+    parser.add_argument('-o', '--out', default='population.npz', help='The file to write the population to')
+
+    args = parser.parse_args()
+    taxpayers = shard(args.count, args.shard[1], args.shard[0]) if args.shard else range(args.count)
+
+    save(population(taxpayers.stop, args.seed, taxpayers.start), args.out)
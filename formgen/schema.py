@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+#coding:utf-8
+
+"""
+Schema
+
+A schema maps the logical names of a form's fields, such as `wages` or
+`dependent[2].ssn`, to their fully qualified names in the template, such as
+`topmostSubform[0].CopyB[0].Col_Right[0].Box1_ReadOrder[0].f2_09[0]`. Full names
+are built and interned once when the generator is imported, so filling a record
+is a single dictionary merge over the defaults of the form.
+
+Forms printed as several copies, such as Copies A, B and C of a W-2, repeat the
+same fields under one subform per copy. A schema may span any number of these
+copies, in which case each logical name resolves to the field of every copy.
+"""
+
+import sys
+
+from collections import namedtuple
+
+# `fields` maps each logical name to the fully qualified names of its field in
+# every copy, and `defaults` maps fully qualified names to the value filled when
+# a record omits them.
+Schema = namedtuple('Schema', ['fields', 'defaults'])
+
+def makeSchema(root, columns, defaults={}, copies=()):
+    """
+    makeSchema builds the schema of a form whose fields all sit under `root`,
+    and again under each subform of `copies`.
+
+    Input
+        root (string): The fully qualified name of the subform holding the
+        fields, e.g. topmostSubform[0].CopyB[0]
+        columns (dict): Field paths relative to `root` keyed by logical name
+        defaults (dict): Default values keyed by field path relative to `root`
+        copies (Iterable(string)): The fully qualified names of other subforms
+        holding the same fields as `root`
+
+    Output
+        A Schema
+
+    >>> s = makeSchema('top[0]', { 'wages': 'Box1[0]' }, { 'Box1[0]': 0, 'Box2[0]': 0 })
+    >>> s.fields
+    {'wages': ('top[0].Box1[0]',)}
+
+    >>> s.defaults
+    {'top[0].Box1[0]': 0, 'top[0].Box2[0]': 0}
+
+    >>> makeSchema('top[0]', { 'wages': 'Box1[0]' }, copies=['copy[0]']).fields
+    {'wages': ('top[0].Box1[0]', 'copy[0].Box1[0]')}
+    """
+    roots = [root, *copies]
+
+    def qualify(path):
+        return tuple(sys.intern(f'{r}.{path}') for r in roots)
+
+    return Schema({ name: qualify(path) for name, path in columns.items() },
+                  { field: value for path, value in defaults.items() for field in qualify(path) })
+
+def resolve(schema, row):
+    """
+    resolve maps a record keyed by logical name onto fully qualified field
+    names on top of the defaults of `schema`. Names the schema does not know
+    are ignored.
+
+    >>> s = makeSchema('top[0]', { 'wages': 'Box1[0]' }, { 'Box1[0]': 0, 'Box2[0]': 0 })
+    >>> resolve(s, { 'wages': 100, 'tips': 5 })
+    {'top[0].Box1[0]': 100, 'top[0].Box2[0]': 0}
+
+    >>> resolve(makeSchema('a[0]', { 'wages': 'Box1[0]' }, copies=['b[0]']), { 'wages': 100 })
+    {'a[0].Box1[0]': 100, 'b[0].Box1[0]': 100}
+    """
+    fields = schema.fields
+
+    return schema.defaults | { f: value for name, value in row.items() if name in fields for f in fields[name] }
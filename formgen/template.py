@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+#coding:utf-8
+
+"""
+Template
+
+Helpers shared by the form generators for filling many forms from a template
+that is parsed only once. A template is a writer cloned from the blank form
+along with an index of the widgets of each field of its AcroForm field tree.
+
+An incremental template writes each filled form as the bytes of the blank form
+followed by an update section holding only the objects the fill changed. The
+fonts and XFA streams of the blank form are copied as they are rather than
+serialized again for every form, and any viewer applies the update on top of
+the original just as it would for a form saved by hand. This trades size for
+write time: every form holds the whole blank form plus its update, so it is
+never smaller than the blank form and comes out larger than a rewritten form,
+e.g. 57 kB rather than 52 kB for a W-2. Writing pays off for blank forms whose
+fonts and streams are costly to serialize again, e.g. 9 ms rather than 15 ms
+per W-2, but not for small ones such as the 1040. The bench cases fill/FORM and
+fill/FORM/incremental measure both.
+
+Many filled forms may also be merged into one PDF, in which the objects every
+form shares with the blank form, such as its fonts, are stored only once. The
+saving depends on the form, e.g. 50 kB rather than 52 kB per W-2 and 16 kB
+rather than 19 kB per 1040, but none for the 1099-INT, and merging takes several
+times longer than filling. The bench case merge/FORM measures it.
+"""
+
+import os
+
+from io import BytesIO
+
+from taxstuff import instrument
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DictionaryObject, NameObject, TextStringObject
+
+# The directory holding the blank forms, wherever the generators are run from
+formsDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'forms')
+
+# Fully qualified name of a field, e.g. topmostSubform[0].CopyB[0].f2_01[0]
+def _qualified_name(field):
+    names = []
+    while field is not None:
+        if '/T' in field:
+            names.append(field['/T'])
+
+        field = field.get('/Parent')
+        field = field.get_object() if field is not None else None
+
+    return '.'.join(reversed(names))
+
+def loadTemplate(path, schema=None, incremental=False):
+    """
+    loadTemplate parses the blank form at `path` once and indexes the widgets of
+    each field of its AcroForm field tree. The writer is reused for every form
+    stamped from it.
+
+    Input
+        path (string): Path to the blank form
+        schema (Schema): Optionally check that the template has every field of
+        the schema
+        incremental (bool): Write each form as an incremental update of the
+        blank form rather than rewriting the whole document. Forms come out
+        larger, and are written faster only when the blank form is costly to
+        serialize
+
+    Output
+        A tuple of the writer and a dictionary mapping each fully qualified
+        field name to the widgets of that field
+
+    Raises
+        - ValueError if a field of `schema` is missing from the template
+    """
+    with instrument.stage('parse template'):
+        if incremental:
+            writer = PdfWriter(path, incremental=True)
+        else:
+            writer = PdfWriter(clone_from=PdfReader(path))
+
+        writer.set_need_appearances_writer(False)
+
+    # Each field gets a stand-in page holding only its own widgets. pypdf only
+    # reads the annotations of the page it is given unless flattening, so
+    # filling a field never scans the other annotations of its page.
+    widgets = {}
+    with instrument.stage('index widgets'):
+        for page in writer.pages:
+            for ref in page.get('/Annots', []):
+                annotation = ref.get_object()
+
+                if annotation.get('/Subtype') == '/Widget':
+                    name = _qualified_name(annotation)
+
+                    if name not in widgets:
+                        widgets[name] = DictionaryObject({ NameObject('/Annots'): ArrayObject() })
+
+                    widgets[name]['/Annots'].append(ref)
+
+    if schema is not None:
+        missing = [f for names in schema.fields.values() for f in names if f not in widgets]
+        missing += [f for f in schema.defaults if f not in widgets]
+
+        if missing:
+            raise ValueError(f'{path} is missing fields: {", ".join(sorted(set(missing)))}')
+
+    return (writer, widgets)
+
+def fillForm(template, values, out):
+    """
+    fillForm sets `values` on the fields of `template` and writes the filled
+    form to `out`. Fields the template does not have are ignored.
+
+    The writer is shared between records, so callers are expected to fill the
+    same fields for every record. A field missing from `values` keeps whatever
+    the previous record put there.
+
+    Input
+        template (tuple): A template returned by `loadTemplate`
+        values (dict): Field values keyed by fully qualified field name
+        out (string | BinaryIO): Path of the filled form, or a stream to write
+        it to
+    """
+    (writer, widgets) = template
+
+    with instrument.stage('set fields'):
+        n = 0
+        for field, value in values.items():
+            if field in widgets:
+                writer.update_page_form_field_values(widgets[field], { field: value }, auto_regenerate=None)
+                n += 1
+
+    with instrument.stage('write'):
+        writer.write(out)
+
+    instrument.count('records')
+    instrument.count('fields set', n)
+
+    if instrument.stats() is not None:
+        instrument.count('bytes written', out.tell() if hasattr(out, 'tell') else os.path.getsize(out))
+
+def formBytes(template, values):
+    """
+    formBytes fills `values` on `template` as `fillForm` does and returns the
+    filled form rather than writing it out.
+    """
+    buffer = BytesIO()
+    fillForm(template, values, buffer)
+
+    return buffer.getvalue()
+
+def mergeForms(forms, out):
+    """
+    mergeForms writes the filled forms `forms` one after another into the
+    single PDF `out`.
+
+    The top-level fields of each form are suffixed with its position in the
+    batch so that no two forms share a field. The XFA form of the template
+    describes only one form, so it is dropped in favour of the AcroForm. Objects
+    identical between forms are stored once.
+
+    This is not a stream: `forms` is consumed one form at a time, but every
+    form is parsed into the merged document and kept there until the whole
+    batch is deduplicated and written at the end, so memory grows with the
+    size of the batch.
+
+    Input
+        forms (Iterable(bytes)): Filled forms, as returned by `formBytes`
+        out (string | BinaryIO): Path of the merged PDF, or a stream to write
+        it to
+
+    Output
+        The number of forms merged
+    """
+    merged = PdfWriter()
+
+    n = 0
+    for n, form in enumerate(forms, 1):
+        with instrument.stage('merge form'):
+            reader = PdfReader(BytesIO(form))
+
+            for field in reader.root_object['/AcroForm']['/Fields']:
+                field = field.get_object()
+                field[NameObject('/T')] = TextStringObject(f'{field["/T"]}-{n:06}')
+
+            merged.append(reader)
+
+    if '/AcroForm' in merged.root_object:
+        merged.root_object['/AcroForm'].pop('/XFA', None)
+
+    with instrument.stage('deduplicate objects'):
+        merged.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+
+    with instrument.stage('write merged'):
+        merged.write(out)
+
+    return n
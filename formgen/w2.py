@@ -8,19 +8,47 @@ This program populates a form W-2 for purposes of practing tax returns. Wages
 are generated within the minimum amount to issue (e.g 600) and the threshold
 for the highest tax bracket (MFJ)
 
+USAGE
+
+    ./w2.py [-n COUNT | -i WAGES] [-a] [-u] [-o OUT] [--profile] [--trace TRACE]
+
+OPTIONS
+    -n, --count         Generate COUNT W-2s with random wages
+    -i, --input         Generate one W-2 per line of WAGES, a file of wage amounts
+    -a, --all-copies    Fill Copies A, 1, B, C and 2 rather than only Copy B
+    -u, --incremental   Write each W-2 as an incremental update of the blank form
+    -o, --out           The directory to write the W-2s to in bulk mode
+    --profile           Print the time spent in each stage when done
+    --trace             Also write the stages, counters and a trace of every
+                        stage to TRACE
+
+Without --count or --input a single W-2 is written to filled-w-2.pdf.
+
 TODO: Currently this assumes wages are equal to taxable income, which is clearly
 wrong. Need to incorporate other packages that properly adjust income to arrive
 at TI.
 """
 
+import os
+import sys
+import time
+import argparse
+
+from taxstuff import instrument
+
 from math import floor
 from random import randint
 
-from pypdf import PdfReader, PdfWriter
+import numpy as np
 
-from taxcredits.tax_schedule import figureTax
+from taxcredits.tax_schedule import figureTaxCentsStacked, compiledCentsStack
 
-writer = PdfWriter()
+from schema import makeSchema, resolve
+from template import loadTemplate, fillForm, formsDir
+
+# The blank form and the name given to filled copies of it
+blankForm = os.path.join(formsDir, 'fw2.pdf')
+formName = 'w-2'
 
 # Generate random wages between $600 and $751,601
 def _rdmWages():
@@ -34,6 +62,23 @@ def _fica(wages):
 
     return (ss, medicare)
 
+# Computes SS and Med tax exactly on wages in cents, with rates in basis points,
+# truncating each to whole cents
+def _fica_cents(cents):
+    ss = min(cents, 176_100_00) * 620 // 10_000
+    medicare = (cents * 145 + max(cents - 200_000_00, 0) * 90) // 10_000
+
+    return (ss, medicare)
+
+# Computes SS and Med tax as `_fica_cents` does over an int64 array of wages in
+# cents. The wage base and the threshold of Additional Medicare tax are applied
+# with elementwise minimum and maximum, so no Python loop runs per wage.
+def _fica_cents_batch(cents):
+    ss = np.minimum(cents, 176_100_00) * 620 // 10_000
+    medicare = (cents * 145 + np.maximum(cents - 200_000_00, 0) * 90) // 10_000
+
+    return (ss, medicare)
+
 # keep [places] digits after the decimal point
 def _trunc(figure, places=2):
     factor = 10 ** places
@@ -81,51 +126,192 @@ defaultValues = {
         'Box19_ReadOrder[0].f2_39[0]': 4000,                                    # Local Tax
         }
 
-# Randomize wages and compute withholding to put on form W-2
-def _wage_and_wh():
-    wages = _rdmWages()
-    fed = _trunc(figureTax(wages))
-    ss, med = _fica(wages)
-
-    # TODO: Handle different states
-    mdRates = [0.02, 0.03, 0.04, 0.0475, 0.05, 0.0525, 0.055, 0.0575]
-    mdSchedule = [1000, 2000, 3000, 100_000, 125_000, 150_000, 250_000]
-
-    mdtaxtable2025 = {
-            0: lambda i: i * 0.02,
-            1000: lambda i: 20 + ((i - 1000) * 0.03),
-            2000: lambda i: 50 + ((i - 2000) * 0.04),
-            3000: lambda i: 90 + ((i - 3000) * 0.0475),
-            100_000: lambda i: 4697.50 + ((i - 100_000) * 0.05),
-            125_000: lambda i: 5947.50 + ((i - 125_000) * 0.0525),
-            150_000: lambda i: 7260.00 + ((i - 150_000) * 0.0550),
-            250_000: lambda i: 12760.00 + ((i - 250_000) * 0.0575)
-            }
+# Logical names of the fields of a W-2, which are also the record columns read
+# by the pipeline
+columns = {
+        'ssn': 'BoxA_ReadOrder[0].f2_01[0]',
+        'ein': 'Col_Left[0].f2_02[0]',
+        'employer': 'Col_Left[0].f2_03[0]',
+        'control_number': 'Col_Left[0].f2_04[0]',
+        'first_name': 'Col_Left[0].FirstName_ReadOrder[0].f2_05[0]',
+        'last_name': 'Col_Left[0].LastName_ReadOrder[0].f2_06[0]',
+        'address': 'Col_Left[0].f2_08[0]',
+        'wages': 'Col_Right[0].Box1_ReadOrder[0].f2_09[0]',
+        'fed_wh': 'Col_Right[0].f2_10[0]',
+        'ss_wages': 'Col_Right[0].Box3_ReadOrder[0].f2_11[0]',
+        'ss_wh': 'Col_Right[0].f2_12[0]',
+        'medicare_wages': 'Col_Right[0].Box5_ReadOrder[0].f2_13[0]',
+        'medicare_wh': 'Col_Right[0].f2_14[0]',
+        'ss_tips': 'Col_Right[0].Box7_ReadOrder[0].f2_15[0]',
+        'allocated_tips': 'Col_Right[0].f2_16[0]',
+        'dep_care': 'Col_Right[0].f2_18[0]',
+        'statutory': 'Col_Right[0].Statutory_ReadOrder[0].c2_2[0]',
+        'retirement': 'Col_Right[0].Retirement_ReadOrder[0].c2_3[0]',
+        'state': 'Boxes15_ReadOrder[0].Box15_ReadOrder[0].f2_29[0]',
+        'state_wages': 'Box16_ReadOrder[0].f2_33[0]',
+        'state_wh': 'Box17_ReadOrder[0].f2_35[0]',
+        'local_wages': 'Box18_ReadOrder[0].f2_37[0]',
+        'local_wh': 'Box19_ReadOrder[0].f2_39[0]',
+        }
+
+schema = makeSchema('topmostSubform[0].CopyB[0]', columns, defaultValues)
+
+# Every copy of the W-2 filled from the same values
+allCopies = makeSchema('topmostSubform[0].CopyB[0]', columns, defaultValues,
+                       [f'topmostSubform[0].Copy{c}[0]' for c in ['A', '1', 'C', '2']])
+
+# The flat local rate of the employee's residence
+localRate = 0.0320
+
+# The federal, state and flat local schedules withholding is computed from,
+# stacked to compute all three in one pass
+# TODO: Handle different states
+residenceStack = compiledCentsStack(('federal', 'MD'), 2025, local=localRate)
+
+# Compute withholding to put on form W-2, randomizing wages if none are given.
+# Withholding is computed exactly in cents and truncated once.
+def _wage_and_wh(wages=None):
+    wages = _rdmWages() if wages is None else wages
+    cents = round(wages * 100)
+
+    (taxes, _) = figureTaxCentsStacked(cents, residenceStack)
+    ss, med = _fica_cents(cents)
+
+    return {
+        'wages': wages,
+        'fed_wh': int(taxes['federal']) / 100,
+        'ss_wages': wages,
+        'ss_wh': ss / 100,
+        'medicare_wages': wages,
+        'medicare_wh': med / 100,
+
+        'state_wages': wages,
+        'state_wh': int(taxes['MD']) / 100,
+        'local_wages': wages,
+        'local_wh': int(taxes['local']) / 100,
+        }
+
+def withholding(wages):
+    """
+    withholding computes the wages and withholding of every W-2 of a payroll at
+    once. Each column is computed over the whole array of wages, in cents, and
+    equals what `_wage_and_wh` computes one W-2 at a time.
+
+    Input
+        wages (array_like): The wages of each W-2 in dollars
+
+    Output
+        A dictionary mapping each wage and withholding column of `columns`,
+        e.g. `fed_wh` for Box 2 or `local_wh` for Box 19, to an array of its
+        value on each W-2 in dollars
+
+    Raises
+        - ValueError if any wages are negative
+
+    >>> w = withholding([600, 50_000, 250_000])
+    >>> w['ss_wh'].tolist(), w['medicare_wh'].tolist()
+    ([37.2, 3100.0, 10918.2], [8.7, 725.0, 4075.0])
+
+    >>> all(w[c][1] == _wage_and_wh(50_000)[c] for c in w)
+    True
+    """
+    wages = np.asarray(wages, dtype=np.float64)
+    cents = np.rint(wages * 100).astype(np.int64)
+
+    ss, med = _fica_cents_batch(cents)
+    (taxes, _) = figureTaxCentsStacked(cents, residenceStack)
 
     return {
-        'topmostSubform[0].CopyB[0].Col_Right[0].Box1_ReadOrder[0].f2_09[0]': wages,
-        'topmostSubform[0].CopyB[0].Col_Right[0].f2_10[0]': fed,
-        'topmostSubform[0].CopyB[0].Col_Right[0].Box3_ReadOrder[0].f2_11[0]': wages,
-        'topmostSubform[0].CopyB[0].Col_Right[0].f2_12[0]': _trunc(ss),
-        'topmostSubform[0].CopyB[0].Col_Right[0].Box5_ReadOrder[0].f2_13[0]': wages,
-        'topmostSubform[0].CopyB[0].Col_Right[0].f2_14[0]': _trunc(med),
-
-        'topmostSubform[0].CopyB[0].Box16_ReadOrder[0].f2_33[0]': wages,
-        'topmostSubform[0].CopyB[0].Box17_ReadOrder[0].f2_35[0]': _trunc(figureTax(wages, mdtaxtable2025)),
-        'topmostSubform[0].CopyB[0].Box18_ReadOrder[0].f2_37[0]': wages,
-        'topmostSubform[0].CopyB[0].Box19_ReadOrder[0].f2_39[0]': _trunc(wages * 0.0320),
+        'wages': wages,
+        'fed_wh': taxes['federal'] / 100,
+        'ss_wages': wages,
+        'ss_wh': ss / 100,
+        'medicare_wages': wages,
+        'medicare_wh': med / 100,
+
+        'state_wages': wages,
+        'state_wh': taxes['MD'] / 100,
+        'local_wages': wages,
+        'local_wh': taxes['local'] / 100,
         }
 
+def record(wages=None, schema=schema):
+    """
+    record computes every field of one W-2, randomizing wages if none are
+    given. Each copy of `schema` is filled from the same wages and withholding.
+    """
+    return resolve(schema, _wage_and_wh(wages) | { 'retirement': _onoff() })
+
+def fromRecord(row, schema=schema):
+    """
+    fromRecord computes every field of one W-2 from a record whose keys are
+    `columns`. Withholding is computed from `wages` unless the record gives it.
+    Empty and unknown columns are ignored.
+    """
+    row = { c: v for c, v in row.items() if v not in ('', None) }
+
+    if 'wages' in row:
+        row = _wage_and_wh(float(row['wages'])) | row
+
+    return resolve(schema, row)
+
+def bulk(wages, out='filled-w-2', template=blankForm, every=1000, schema=schema, incremental=False):
+    """
+    bulk stamps one W-2 per element of `wages` into separate files under `out`,
+    parsing the template only once. Progress is reported to stderr in forms per
+    second every `every` forms.
+
+    Input
+        wages (Iterable(float | None)): The wages of each W-2. None randomizes
+        the wages of that form.
+        out (string): The output directory
+        template (string): Path to the blank W-2
+        schema (Schema): The copies to fill, either `schema` or `allCopies`
+        incremental (bool): Write each W-2 as an incremental update of the
+        blank form
+
+    Output
+        The number of forms written
+    """
+    os.makedirs(out, exist_ok=True)
+
+    tmpl = loadTemplate(template, schema, incremental)
+    start = time.perf_counter()
+
+    n = 0
+    for n, w in enumerate(wages, 1):
+        fillForm(tmpl, record(w, schema), f'{out}/{formName}-{n:06}.pdf')
+
+        if n % every == 0:
+            print(f'{n} forms\t{n / (time.perf_counter() - start):.1f} forms/s', file=sys.stderr)
+
+    print(f'{n} forms\t{n / (time.perf_counter() - start):.1f} forms/s', file=sys.stderr)
+
+    return n
+
 if __name__ == "__main__":
-    reader = PdfReader('forms/fw2.pdf')
+    parser = argparse.ArgumentParser(description='Populate forms W-2 with generated wages and withholding')
+    parser.add_argument('-n', '--count', type=int, help='The number of W-2s to generate with random wages')
+    parser.add_argument('-i', '--input', help='A file of wages, one W-2 per line')
+    parser.add_argument('-a', '--all-copies', action='store_true', help='Fill every copy of the W-2 rather than only Copy B')
+    parser.add_argument('-u', '--incremental', action='store_true', help='Write each W-2 as an incremental update of the blank form')
+    parser.add_argument('-o', '--out', default='filled-w-2', help='The directory to write W-2s to in bulk mode')
+    parser.add_argument('--profile', action='store_true', help='Print the time spent in each stage when done')
+    parser.add_argument('--trace', help='Also write the stages, counters and a trace of every stage to TRACE')
 
-    writer.append(reader)
+    args = parser.parse_args()
+    copies = allCopies if args.all_copies else schema
 
-    wage_info = _wage_and_wh()
-    values = { f'topmostSubform[0].CopyB[0].{field}': value for field, value in defaultValues.items() } | wage_info
-    values['topmostSubform[0].CopyB[0].Col_Right[0].Retirement_ReadOrder[0].c2_3[0]'] = _onoff()
+    if args.profile or args.trace:
+        instrument.enable(trace=bool(args.trace))
 
-    writer.update_page_form_field_values(None, values, auto_regenerate=False)
+    if args.input:
+        with open(args.input) as f:
+            bulk((float(line) for line in f if line.strip()), args.out, schema=copies, incremental=args.incremental)
+    elif args.count:
+        bulk((None for _ in range(args.count)), args.out, schema=copies, incremental=args.incremental)
+    else:
+        fillForm(loadTemplate(blankForm, copies), record(schema=copies), f'filled-{formName}.pdf')
 
-    with open('filled-w-2.pdf', 'wb') as output:
-        writer.write(output)
+    if instrument.stats() is not None:
+        instrument.report(instrument.stats(), args.trace)
@@ -10,6 +10,10 @@ Income section of the 1040. The client program is responsible for figuring the
 adjusted gross income and taxable income.
 """
 
+from collections import namedtuple
+
+import numpy as np
+
 def taxable_dep_care(benefits, expenses):
     """
     taxable_dep_care computes the amount of dependent care benefits that are
@@ -24,47 +28,148 @@ def taxable_dep_care(benefits, expenses):
 def taxable_adoption_benefits():
     return 0
 
-def taxable_ss(income, filingStatus):
+# The inputs of the Social Security Benefits Worksheet of the 1040
+# instructions, one field per amount rather than one dictionary per form:
+#
+#   benefits            SSA-1099 and RRB-1099 box 5 (worksheet line 1)
+#   income              1040 lines 1z, 2b, 3b, 4b, 5b, 7 and 8 (line 3)
+#   exempt_interest     1040 line 2a (line 4)
+#   adjustments         Schedule 1 lines 11 through 20, 23 and 25 (line 6)
+#   status              One of `filingStatuses`
+#   lived_apart         Whether a married taxpayer filing separately lived
+#                       apart from their spouse all year
+SSWorksheet = namedtuple('SSWorksheet', ['benefits', 'income', 'exempt_interest', 'adjustments', 'status', 'lived_apart'],
+                         defaults=[0, 0, 0, 'S', False])
+
+# Filing statuses in the order the 1040 lists them
+filingStatuses = ['S', 'HOH', 'MFJ', 'MFS', 'QSS']
+
+# The base amount (worksheet line 8) and the amount above it taxed at 50%
+# (line 10) of each filing status. Married taxpayers filing separately who lived
+# with their spouse skip lines 8 through 15, which is the same as both being 0.
+_baseAmounts = {
+        'S': (25_000, 9_000),
+        'HOH': (25_000, 9_000),
+        'MFJ': (32_000, 12_000),
+        'MFS': (0, 0),
+        'QSS': (25_000, 9_000),
+        }
+
+def taxable_ss(worksheet):
     """
-    taxable_ss computes the taxable portion of social security benefits using
-    income information from the 1040 and Schedule 1. This information is given
-    as a dictionary of the following form:
+    taxable_ss computes the taxable portion of social security benefits by
+    completing the Social Security Benefits Worksheet found in the 1040
+    instructions for lines 6a and 6b.
 
-    {
-        <form>: {
-            <line>: <value>
-        }
-    }
+    Input
+        worksheet (SSWorksheet): The benefits, other income, tax-exempt
+        interest, adjustments and filing status of the return
 
-    for example:
+    Output
+        The taxable portion of Social Security benefits (1040 line 6b)
 
-    {
-        'SSA-1099': {
-            'Box5': 42000
-        },
-        '1040': {
-            '1z': 20000
-        }
-    }
+    Raises
+        - KeyError if the filing status is not one of `filingStatuses`
+
+    Examples
+
+    >>> taxable_ss(SSWorksheet(65000))
+    3750.0
+
+    >>> taxable_ss(SSWorksheet(20000, income=20000))
+    2500.0
 
-    This is more structure than strictly necessary, but makes the relationship
-    to the Social Security Benefits Worksheet found in the 1040 instructions a
-    bit clearer.
+    >>> taxable_ss(SSWorksheet(30000, income=40000, status='MFJ'))
+    15350.0
+
+    >>> taxable_ss(SSWorksheet(30000, income=40000, adjustments=50000, status='MFJ'))
+    0.0
+
+    >>> taxable_ss(SSWorksheet(10000, income=5000, status='MFS'))
+    8500.0
+
+    >>> taxable_ss(SSWorksheet(10000, income=5000, status='MFS', lived_apart=True))
+    0.0
+    """
+    (benefits, income, exempt, adjustments, status, livedApart) = worksheet
+    (base, upper) = _baseAmounts['S' if status == 'MFS' and livedApart else status]
+
+    half = benefits * 0.5                                   # Line 2
+    line7 = max(half + income + exempt - adjustments, 0)    # Lines 5 through 7
+    line9 = max(line7 - base, 0)
+    line11 = max(line9 - upper, 0)
+    line14 = min(half, min(line9, upper) * 0.5)             # Lines 12 through 14
+
+    return min(line14 + line11 * 0.85, benefits * 0.85)     # Lines 15 through 18
+
+def taxable_ss_batch(benefits, income=0, exempt_interest=0, adjustments=0, status='S', lived_apart=False):
+    """
+    taxable_ss_batch completes the Social Security Benefits Worksheet for many
+    returns at once. Each argument is an array holding one amount of every
+    return, or a single amount shared by all of them, and every line of the
+    worksheet is computed over whole arrays.
 
     Input
-        income dict(string) float: A dictionary containing the relevant income
-        information needed to compute the taxable portion of SS benefits.
+        benefits, income, exempt_interest, adjustments (array_like): The
+        amounts of `SSWorksheet`
+        status (array_like): The filing status of each return, either one of
+        `filingStatuses` or its index
+        lived_apart (array_like(bool)): Whether each married taxpayer filing
+        separately lived apart from their spouse all year
 
     Output
-        The taxable portion of Social Security benefits
+        A float64 array of the taxable portion of each return's benefits, equal
+        to what `taxable_ss` computes for the return
 
+    Raises
+        - KeyError if any filing status is not one of `filingStatuses` or an
+        index into it
 
-    Examples
+    >>> taxable_ss_batch([65000, 30000, 10000, 10000], [0, 40000, 5000, 5000],
+    ...                  status=['S', 'MFJ', 'MFS', 'MFS'], lived_apart=[False, False, False, True]).tolist()
+    [3750.0, 15350.0, 8500.0, 0.0]
 
-    >>> taxable_ss({ 'SSA-1099': 65000 }, 'S')
-    0
+    >>> taxable_ss_batch([20000, 20000], 20000, status=[0, 2]).tolist()
+    [2500.0, 0.0]
+
+    >>> taxable_ss_batch([20000, 20000], 20000, status=[0, 5])
+    Traceback (most recent call last):
+        ...
+    KeyError: 5
     """
-    return 0
+    benefits = np.asarray(benefits, dtype=np.float64)
+    status = np.asarray(status)
+
+    # Filing statuses given by name are converted to their index
+    if status.dtype.kind not in 'iu':
+        index = np.full(status.shape, -1)
+        for i, name in enumerate(filingStatuses):
+            index[status == name] = i
+
+        if (index < 0).any():
+            raise KeyError(str(status[index < 0].flat[0]))
+
+        status = index
+    else:
+        # Indices past either end would read another status, or the last one
+        invalid = (status < 0) | (status >= len(filingStatuses))
+        if invalid.any():
+            raise KeyError(int(status[invalid].flat[0]))
+
+    # Married taxpayers filing separately who lived apart use the amounts of a
+    # single filer
+    apart = (status == filingStatuses.index('MFS')) & np.asarray(lived_apart, dtype=bool)
+    status = np.where(apart, filingStatuses.index('S'), status)
+
+    (base, upper) = np.asarray([_baseAmounts[s] for s in filingStatuses]).T[:, status]
+
+    half = benefits * 0.5
+    line7 = np.maximum(half + income + exempt_interest - adjustments, 0)
+    line9 = np.maximum(line7 - base, 0)
+    line11 = np.maximum(line9 - upper, 0)
+    line14 = np.minimum(half, np.minimum(line9, upper) * 0.5)
+
+    return np.minimum(line14 + line11 * 0.85, benefits * 0.85)
 
 if __name__ == "__main__":
     print('hello')
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+#coding:utf-8
+
+"""
+Returns
+
+This package links the lines of a return to the lines they are computed from:
+the boxes of the W-2, 1099-INT and SSA-1099, line 26 of form 2441 and the lines
+of the 1040 from total income down to the refund or amount owed. Each line is a
+node of a graph whose edges run from the lines it reads to the line itself.
+
+A `Return` holds the inputs of one return and computes lines only when they are
+asked for, remembering each result. Changing an input forgets only the lines
+downstream of it, so asking again recomputes those lines and nothing else. This
+keeps what-if analysis cheap: a scenario copies the lines already computed and
+recomputes only what its changes reach.
+
+Lines are named <form>.<line>, e.g. `W-2.1` for the wages of box 1 of the W-2
+or `1040.11` for adjusted gross income.
+
+NOTE: Only the lines needed to carry wages, interest and Social Security
+benefits through to tax are linked. Credits, other taxes and schedules beyond
+their totals are not yet part of the graph.
+"""
+
+from taxstuff import instrument
+
+from income.income import SSWorksheet, taxable_ss, taxable_dep_care
+from taxcredits.tax_schedule import figureTaxCents, compiledCentsSchedule, standardDeduction
+
+# Marks a line that has not been computed, as None is a valid result
+_missing = object()
+
+class Graph:
+    """
+    Graph holds the inputs of a return, the lines computed from them and the
+    lines reading each line.
+    """
+    def __init__(self):
+        self.inputs = {}
+        self.lines = {}
+        self.dependents = {}
+
+    def _add(self, name):
+        if name in self.dependents:
+            raise ValueError(f'{name} is already defined')
+
+        self.dependents[name] = []
+
+    def input(self, name, default=0):
+        """
+        input adds the input `name`, given `default` until a return sets it.
+        """
+        self._add(name)
+        self.inputs[name] = default
+
+    def line(self, name, fn, *deps):
+        """
+        line adds the line `name`, computed by calling `fn` with the value of
+        each of `deps`. Lines may only read inputs and lines already added, so
+        the graph can never hold a cycle.
+
+        Raises
+            - ValueError if `name` is already defined or a dependency is not
+        """
+        unknown = [d for d in deps if d not in self.dependents]
+        if unknown:
+            raise ValueError(f'{name} reads undefined lines: {", ".join(unknown)}')
+
+        self._add(name)
+        self.lines[name] = (fn, deps)
+
+        for d in deps:
+            self.dependents[d].append(name)
+
+    def downstream(self, name):
+        """
+        downstream returns every line computed, directly or not, from `name`.
+        """
+        found = []
+        stack = list(self.dependents[name])
+
+        while stack:
+            n = stack.pop()
+            if n not in found:
+                found.append(n)
+                stack.extend(self.dependents[n])
+
+        return found
+
+class Return:
+    """
+    Return holds the inputs of one return and the lines computed from them so
+    far.
+
+    >>> r = Return(form1040, { 'W-2.1': 60000, 'W-2.2': 6000 })
+    >>> r['1040.15'], r['1040.16'], r['1040.34']
+    (44250.0, 5075.0, 925.0)
+
+    Changing an input recomputes only the lines downstream of it
+
+    >>> r['1099-INT.1'] = 1000
+    >>> r['1040.15'], r['1040.16']
+    (45250.0, 5195.0)
+
+    >>> r.whatIf({ 'status': 'MFJ' }, ['1040.16', '1040.37'])
+    {'1040.16': 3066.0, '1040.37': 0}
+
+    >>> r['1040.16']
+    5195.0
+
+    Student loan interest lowers adjusted gross income but not the income the
+    taxable portion of Social Security benefits is figured from
+
+    >>> r = Return(form1040, { 'W-2.1': 25000, 'SSA-1099.5': 20000, 'Schedule 1.21': 2500, 'Schedule 1.26': 2500 })
+    >>> r['1040.11'], r['1040.6b']
+    (27850.0, 5350.0)
+    """
+    def __init__(self, graph, values={}):
+        self.graph = graph
+        self.values = dict(graph.inputs)
+        self._memo = {}
+
+        self.update(values)
+
+    def __getitem__(self, name):
+        if name in self.values:
+            return self.values[name]
+
+        value = self._memo.get(name, _missing)
+        if value is _missing:
+            (fn, deps) = self.graph.lines[name]
+            value = self._memo[name] = fn(*(self[d] for d in deps))
+
+            instrument.count('lines computed')
+
+        return value
+
+    def __setitem__(self, name, value):
+        if name not in self.graph.inputs:
+            raise KeyError(name)
+
+        if self.values[name] == value:
+            return
+
+        self.values[name] = value
+
+        # A line is only remembered if every line it reads is, so the search
+        # stops at lines already forgotten
+        stack = list(self.graph.dependents[name])
+        while stack:
+            n = stack.pop()
+            if self._memo.pop(n, _missing) is not _missing:
+                stack.extend(self.graph.dependents[n])
+
+    def update(self, values):
+        """
+        update sets each input of `values`.
+        """
+        for name, value in values.items():
+            self[name] = value
+
+    def copy(self):
+        """
+        copy returns a return with the same inputs, sharing the lines computed
+        so far.
+        """
+        other = Return.__new__(Return)
+        other.graph = self.graph
+        other.values = dict(self.values)
+        other._memo = dict(self._memo)
+
+        return other
+
+    def whatIf(self, changes, lines):
+        """
+        whatIf computes `lines` as they would be with the inputs of `changes`,
+        leaving this return as it is.
+
+        Input
+            changes (dict): The value of each input to change
+            lines (Iterable(string)): The lines to compute
+
+        Output
+            A dictionary mapping each of `lines` to its value in the scenario
+        """
+        scenario = self.copy()
+        scenario.update(changes)
+
+        return { name: scenario[name] for name in lines }
+
+# Taxable income below this, in cents, is taxed by the Tax Table rather than by
+# the Tax Computation Worksheet
+_taxTableLimit = 100_000_00
+
+# The row of the Tax Table holding `cents`, as its start and width in cents.
+# Rows are $5 wide below $5, $10 wide below $25, $25 wide below $3,000 and $50
+# wide from there on.
+def _taxTableRow(cents):
+    if cents < 5_00:
+        return (0, 5_00)
+
+    if cents < 25_00:
+        return (cents - (cents - 5_00) % 10_00, 10_00)
+
+    width = 25_00 if cents < 3000_00 else 50_00
+
+    return (cents - cents % width, width)
+
+# Below $100,000 the Tax Table taxes the midpoint of each row, rounded to whole
+# dollars. Above it the tax is figured exactly.
+def _tax(taxable, status, year):
+    schedule = compiledCentsSchedule('federal', year, status)
+    cents = round(taxable * 100)
+
+    if cents >= _taxTableLimit:
+        return figureTaxCents(cents, schedule) / 100
+
+    (start, width) = _taxTableRow(cents)
+    tax = figureTaxCents(start + width // 2, schedule)
+
+    return float((tax + 50) // 100)
+
+def _makeForm1040():
+    g = Graph()
+
+    g.input('year', 2025)
+    g.input('status', 'S')
+    g.input('lived_apart', False)
+
+    g.input('W-2.1')                    # Wages, tips, other compensation
+    g.input('W-2.2')                    # Federal income tax withheld
+    g.input('W-2.10')                   # Dependent care benefits
+    g.input('2441.expenses')            # Qualified expenses incurred and paid
+    g.input('1099-INT.1')               # Interest income
+    g.input('1099-INT.4')               # Federal income tax withheld
+    g.input('1099-INT.8')               # Tax-exempt interest
+    g.input('SSA-1099.5')               # Net benefits
+    g.input('Schedule 1.10')            # Additional income
+    g.input('Schedule 1.21')            # Student loan interest deduction
+    g.input('Schedule 1.24z')           # Other adjustments
+    g.input('Schedule 1.26')            # Adjustments to income
+    g.input('Schedule A.17')            # Itemized deductions
+
+    g.line('2441.26', taxable_dep_care, 'W-2.10', '2441.expenses')
+
+    g.line('1040.1a', lambda w: w, 'W-2.1')
+    g.line('1040.1e', lambda t: t, '2441.26')
+    g.line('1040.1z', lambda a, e: a + e, '1040.1a', '1040.1e')
+    g.line('1040.2a', lambda i: i, '1099-INT.8')
+    g.line('1040.2b', lambda i: i, '1099-INT.1')
+    g.line('1040.8', lambda i: i, 'Schedule 1.10')
+    g.line('1040.10', lambda a: a, 'Schedule 1.26')
+
+    # Line 6 of the Social Security Benefits Worksheet holds the adjustments to
+    # income other than student loan interest and those of line 24z
+    g.line('SS Worksheet.6', lambda a, s, o: a - s - o, 'Schedule 1.26', 'Schedule 1.21', 'Schedule 1.24z')
+
+    g.line('1040.6a', lambda b: b, 'SSA-1099.5')
+    g.line('1040.6b', lambda b, z, i, e, o, a, s, l: taxable_ss(SSWorksheet(b, z + i + o, e, a, s, l)),
+           '1040.6a', '1040.1z', '1040.2b', '1040.2a', '1040.8', 'SS Worksheet.6', 'status', 'lived_apart')
+
+    g.line('1040.9', lambda z, i, ss, o: z + i + ss + o, '1040.1z', '1040.2b', '1040.6b', '1040.8')
+    g.line('1040.11', lambda t, a: t - a, '1040.9', '1040.10')
+    g.line('1040.12', lambda s, y, i: max(standardDeduction('federal', y, s), i), 'status', 'year', 'Schedule A.17')
+    g.line('1040.15', lambda agi, d: max(agi - d, 0), '1040.11', '1040.12')
+    g.line('1040.16', _tax, '1040.15', 'status', 'year')
+    g.line('1040.24', lambda t: t, '1040.16')
+
+    g.line('1040.25a', lambda w: w, 'W-2.2')
+    g.line('1040.25b', lambda w: w, '1099-INT.4')
+    g.line('1040.25d', lambda a, b: a + b, '1040.25a', '1040.25b')
+    g.line('1040.33', lambda w: w, '1040.25d')
+
+    g.line('1040.34', lambda p, t: max(p - t, 0), '1040.33', '1040.24')
+    g.line('1040.37', lambda p, t: max(t - p, 0), '1040.33', '1040.24')
+
+    return g
+
+# The lines of a 1040 carrying wages, interest and benefits through to tax
+form1040 = _makeForm1040()
@@ -11,50 +11,169 @@ schedule is defined as an associative list of the following tuples:
 where `upperBound` is upper limit for income taxed at the `marginalRate` for a
 given bracket.
 
+The schedules of each jurisdiction are kept as data under rates/<year>/, one
+JSON file per jurisdiction holding the bounds and rates for each filing status,
+along with its standard deduction where the jurisdiction has a fixed one:
+
+    { "S": { "bounds": [11925, ...], "rates": [0.10, ...], "deduction": 15750 }, "MFJ": ... }
+
+Files are only read when a schedule of theirs is first asked for, and each
+schedule is compiled once. Adding a year or a state is a matter of adding its
+file.
+
+numpy is only imported by the functions working over arrays of incomes, so
+computing the tax on one income from the command line starts quickly.
+
+USAGE
+
+    ./tax_schedule.py [OPTIONS] [INCOME]
+
+    INCOME is the taxable income. Default is to prompt for it
+
+OPTIONS
+    -s, --status        The filing status, one of S, HOH, MFJ, MFS or QSS. Default is S
+    -y, --year          The tax year. Default is 2025
+    -j, --jurisdictions The jurisdictions taxing the income. Default is federal MD
+    -l, --local         The flat local rate. Default is 0.032
+
 NOTE: This program is only suitable for computing income subject to a tax rate
 schedule, and will not compute overall tax correctly for other taxable income
 such as capital gains.
 """
 
+import os
+import json
 import math
+import argparse
+
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from functools import lru_cache
+
+# The directory holding the rate schedule of each year and jurisdiction
+ratesDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rates')
+
+# Compiled form of a (schedule, rates) pair. `bounds` holds the lower bound of
+# each bracket, `bases` the tax owed on income up to that bound and `rates` the
+# marginal rate within the bracket. Plain tuples keep it cheap to pickle.
+TaxSchedule = namedtuple('TaxSchedule', ['bounds', 'bases', 'rates'])
+
+@lru_cache(maxsize=None)
+def _loadFile(jurisdiction, year):
+    try:
+        with open(os.path.join(ratesDir, str(year), f'{jurisdiction}.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise KeyError((jurisdiction, year)) from None
+
+@lru_cache(maxsize=None)
+def _loadRates(jurisdiction, year):
+    return { status: (tuple(s['bounds']), tuple(s['rates'])) for status, s in _loadFile(jurisdiction, year).items() }
+
+def rateSchedule(jurisdiction='federal', year=2025, status='S'):
+    """
+    rateSchedule returns the bracket bounds and marginal rates of
+    `jurisdiction` for `year` and the filing status `status`, one of S, HOH,
+    MFJ, MFS or QSS.
+
+    >>> rateSchedule('federal', 2025, 'MFJ')[0]
+    (23850, 96950, 206700, 394600, 501050, 751600)
+
+    >>> rateSchedule('VA', 2025)
+    Traceback (most recent call last):
+        ...
+    KeyError: ('VA', 2025)
+
+    >>> rateSchedule('MD', 2025, 'XYZ')
+    Traceback (most recent call last):
+        ...
+    KeyError: ('MD', 2025, 'XYZ')
+    """
+    statuses = _loadRates(jurisdiction, year)
+
+    if status not in statuses:
+        raise KeyError((jurisdiction, year, status))
+
+    return statuses[status]
+
+def standardDeduction(jurisdiction='federal', year=2025, status='S'):
+    """
+    standardDeduction returns the standard deduction of `jurisdiction` for
+    `year` and the filing status `status`.
+
+    >>> standardDeduction('federal', 2025, 'HOH')
+    23625
+
+    >>> standardDeduction('MD', 2025)
+    Traceback (most recent call last):
+        ...
+    KeyError: ('MD', 2025, 'S')
+    """
+    statuses = _loadFile(jurisdiction, year)
 
-# Upper bounds defining each tax bracket for 2025
-schedule2025 = [11925,
-                48475,
-                103350,
-                197300,
-                250525,
-                626350]
-
-fedRates = [0.10, 0.12, 0.22, 0.24, 0.32, 0.35, 0.37]
-
-# TODO. This table should be easy to compute given the brackets and rates
-taxtable2025 = {
-        0: lambda i: i * 0.10,
-        11_925: lambda i: 1192.50 + ((i - 11_925) * 0.12),
-        48_475: lambda i: 5578.50 + ((i - 48_475) * 0.22),
-        103_350: lambda i: 17651.00 + ((i - 103_350) * 0.24),
-        197_300: lambda i: 40199.00 + ((i - 197_300) * 0.32),
-        250_525: lambda i: 57231.00 + ((i - 250_525) * 0.35),
-        626_350: lambda i: 188769.75 + ((i - 626_350) * 0.37)
-        }
-
-mdtaxtable2025 = {
-        0: lambda i: i * 0.02,
-        1000: lambda i: 20 + ((i - 1000) * 0.03),
-        2000: lambda i: 50 + ((i - 2000) * 0.04),
-        3000: lambda i: 90 + ((i - 3000) * 0.0475),
-        100_000: lambda i: 4697.50 + ((i - 100_000) * 0.05),
-        125_000: lambda i: 5947.50 + ((i - 125_000) * 0.0525),
-        150_000: lambda i: 7260.00 + ((i - 150_000) * 0.0550),
-        250_000: lambda i: 12760.00 + ((i - 250_000) * 0.0575)
-        }
+    if 'deduction' not in statuses.get(status, {}):
+        raise KeyError((jurisdiction, year, status))
+
+    return statuses[status]['deduction']
 
 def _compute_tax_schedule(schedule, rates):
-    return {}
+    if len(schedule) > len(rates):
+        raise ValueError('bracket boundaries may not exceed number of tax brackets')
+
+    bounds = [0] + sorted(schedule)
+
+    # The final rate applies to all income above the last bound, matching
+    # `_oracle`. Without any bounds no income is taxed.
+    marginal = list(rates[:len(schedule)]) + [rates[-1] if schedule else 0.0]
+
+    bases = [0.0]
+    for i in range(1, len(bounds)):
+        bases.append(bases[-1] + (bounds[i] - bounds[i-1]) * marginal[i-1])
+
+    return TaxSchedule(tuple(bounds), tuple(bases), tuple(marginal))
+
+@lru_cache(maxsize=None)
+def _compile(schedule, rates):
+    return _compute_tax_schedule(schedule, rates)
+
+# Accept either a compiled schedule or a list of bounds and rates. Without a
+# schedule the federal schedule of a single filer is used, and bounds given
+# without rates take the federal rates of a single filer.
+def _taxtable(schedule, rates):
+    if isinstance(schedule, TaxSchedule):
+        return schedule
+
+    if schedule is None:
+        return compiledSchedule()
+
+    if rates is None:
+        rates = rateSchedule()[1]
+
+    return _compile(tuple(schedule), tuple(rates))
+
+@lru_cache(maxsize=None)
+def compiledSchedule(jurisdiction='federal', year=2025, status='S'):
+    """
+    compiledSchedule returns the compiled tax schedule of `jurisdiction` for
+    `year` and the filing status `status`. Each schedule is only compiled once.
+
+    >>> compiledSchedule('MD', 2025).bases[:4]
+    (0.0, 20.0, 50.0, 90.0)
+
+    >>> compiledSchedule('VA', 2025)
+    Traceback (most recent call last):
+        ...
+    KeyError: ('VA', 2025)
+    """
+    return _compute_tax_schedule(*rateSchedule(jurisdiction, year, status))
 
 # Straightforward implementation used for testing. Works for all taxable income.
-def _oracle(income, schedule=schedule2025, rates=fedRates):
+def _oracle(income, schedule=None, rates=None):
+    if schedule is None:
+        (schedule, rates) = rateSchedule()
+    elif rates is None:
+        rates = rateSchedule()[1]
+
     if income < 0:
         raise ValueError('income must be nonnegative')
 
@@ -80,27 +199,29 @@ def _oracle(income, schedule=schedule2025, rates=fedRates):
     return tax + (income * rates[-1])
 
 # Compute tax using lookup tables and a formula. Consistent with how actual tax
-# preparers would compute tax for taxable income over $100,000. The keys in the
-# taxtable represent the brackets, and the corresponding value computes the tax
-# according to the formula found in the instructions for the 1040.
-def _tax_schedule(income, taxtable=taxtable2025):
-    bracket = 0.0
-    for k in taxtable:
-        # Supremum
-        if income > k:
-            bracket = max(bracket, k)
+# preparers would compute tax for taxable income over $100,000. The bounds of the
+# taxtable represent the brackets, and the corresponding base and rate compute
+# the tax according to the formula found in the instructions for the 1040.
+def _tax_schedule(income, taxtable):
+    # Supremum. Income exactly on a bound is taxed in the lower bracket.
+    i = bisect_left(taxtable.bounds, income, 1) - 1
 
-    return taxtable[bracket](income)
+    return taxtable.bases[i] + ((income - taxtable.bounds[i]) * taxtable.rates[i])
 
-def figureTax(income, taxtable=taxtable2025):
+def figureTax(income, schedule=None, rates=None):
     """
     figureTax computes the tax on `income` by applying the `schedule`.
 
     Input:
         income (float): Total taxable income
 
-        schedule (List(tuple)): A tax schedule whose keys define the bounds of the bracket
-        and whose values indicate the marginal tax rate of that bracket.
+        schedule (List(float) | TaxSchedule): The upper bounds of each tax
+        bracket, or a schedule already compiled by `compiledSchedule`. Default
+        is the 2025 federal schedule of a single filer.
+
+        rates (List(float)): The marginal rate of each bracket. Ignored when
+        `schedule` is compiled. Default is the 2025 federal rates of a single
+        filer.
 
     Output:
         The tax on the provided income.
@@ -114,12 +235,15 @@ def figureTax(income, taxtable=taxtable2025):
     >>> figureTax(0, [11925])
     0.0
 
-    >>> figureTax(11926, schedule2025)
+    >>> figureTax(11926)
     1192.62
 
-    >>> figureTax(147790, schedule2025)
+    >>> figureTax(147790)
     28316.6
 
+    >>> figureTax(147790, compiledSchedule('federal', 2025, 'MFJ'))
+    22341.8
+
     >>> round(figureTax(139819, [11600, 47150, 100525, 191950, 243735]), 2)
     26599.06
 
@@ -134,14 +258,513 @@ def figureTax(income, taxtable=taxtable2025):
     ValueError: income must be nonnegative
     """
 
-    return _tax_schedule(income, taxtable)
+    if income < 0:
+        raise ValueError('income must be nonnegative')
+
+    return _tax_schedule(income, _taxtable(schedule, rates))
+
+def figureTaxBatch(incomes, schedule=None, rates=None):
+    """
+    figureTaxBatch computes the tax on each element of `incomes` by applying
+    the `schedule`. The bracket of every income is found with a single
+    `searchsorted` over the bracket bounds, and the tax owed below each bound is
+    computed once up front, so no Python loop runs per income.
+
+    Input:
+        incomes (array_like): Taxable incomes
+
+        schedule (List(float) | TaxSchedule): Upper bounds of each tax bracket,
+        or a schedule already compiled by `compiledSchedule`. Default is the
+        2025 federal schedule of a single filer.
+
+        rates (List(float)): Marginal rate of each bracket. The last rate applies
+        to all income above the final bound.
+
+    Output:
+        A float64 array of the tax on each income.
+
+    Raises:
+        - ValueError if any income is negative
+
+    >>> figureTaxBatch([0, 11926, 147790]).tolist()
+    [0.0, 1192.62, 28316.6]
+
+    >>> figureTaxBatch([139819], [11600, 47150, 100525, 191950, 243735]).round(2).tolist()
+    [26599.06]
+
+    >>> figureTaxBatch([1000, 2000], []).tolist()
+    [0.0, 0.0]
+
+    >>> figureTaxBatch([-1, 12345])
+    Traceback (most recent call last):
+        ...
+    ValueError: income must be nonnegative
+    """
+    import numpy as np
+
+    incomes = np.asarray(incomes, dtype=np.float64)
+
+    if (incomes < 0).any():
+        raise ValueError('income must be nonnegative')
+
+    taxtable = _taxtable(schedule, rates)
+    bounds = np.asarray(taxtable.bounds, dtype=np.float64)
+
+    # Number of bounds strictly below the income. Income exactly on a bound is
+    # taxed in the lower bracket.
+    idx = np.searchsorted(bounds[1:], incomes, side='left')
+
+    return np.asarray(taxtable.bases)[idx] + (incomes - bounds[idx]) * np.asarray(taxtable.rates)[idx]
+
+def breakpoints(schedule=None, rates=None):
+    """
+    breakpoints returns the corners of the piecewise-linear curve of tax over
+    income drawn by `schedule`. Between two corners the tax rises at the
+    marginal rate of the bracket, and past the last corner at the final rate.
+
+    Input:
+        schedule (List(float) | TaxSchedule): As for `figureTax`
+        rates (List(float)): As for `figureTax`
+
+    Output:
+        A tuple of float64 arrays of the income at each corner, the tax owed on
+        it and the marginal rate of the bracket starting there.
+
+    >>> [a.tolist() for a in breakpoints([10000, 20000], [0.1, 0.2, 0.3])]
+    [[0.0, 10000.0, 20000.0], [0.0, 1000.0, 3000.0], [0.1, 0.2, 0.3]]
+    """
+    import numpy as np
+
+    taxtable = _taxtable(schedule, rates)
+
+    return tuple(np.asarray(a, dtype=np.float64) for a in taxtable)
+
+def marginalRate(incomes, schedule=None, rates=None):
+    """
+    marginalRate returns the rate at which the next dollar earned above each
+    of `incomes` is taxed. Income exactly on a bound is taxed in the lower
+    bracket, so the next dollar falls in the bracket above.
+
+    >>> marginalRate([0, 11925, 11926, 1e6]).tolist()
+    [0.1, 0.12, 0.12, 0.37]
+    """
+    import numpy as np
+
+    (bounds, _, marginal) = breakpoints(schedule, rates)
+
+    return marginal[np.searchsorted(bounds[1:], incomes, side='right')]
+
+def effectiveRate(incomes, schedule=None, rates=None):
+    """
+    effectiveRate returns the tax on each of `incomes` as a share of it. The
+    effective rate of no income is 0.
+
+    >>> effectiveRate([0, 10000, 147790]).round(4).tolist()
+    [0.0, 0.1, 0.1916]
+    """
+    import numpy as np
+
+    incomes = np.asarray(incomes, dtype=np.float64)
+    taxes = figureTaxBatch(incomes, schedule, rates)
+
+    return np.divide(taxes, incomes, out=np.zeros_like(taxes), where=incomes > 0)
+
+def incomeForTax(taxes, schedule=None, rates=None):
+    """
+    incomeForTax inverts `figureTaxBatch`, returning the least income on which
+    each of `taxes` is owed.
+
+    Input:
+        taxes (array_like): Amounts of tax
+
+    Output:
+        A float64 array of the income owing each tax.
+
+    Raises:
+        - ValueError if any tax is negative, or is more than the schedule can
+        ever owe because its final rate is 0
+
+    >>> incomeForTax([0, 1192.5, 28316.6]).round(2).tolist()
+    [0.0, 11925.0, 147790.0]
+
+    >>> incomeForTax([500], [10000], [0.0, 0.1]).tolist()
+    [15000.0]
+
+    >>> incomeForTax([-1])
+    Traceback (most recent call last):
+        ...
+    ValueError: tax must be nonnegative
+    """
+    import numpy as np
+
+    taxes = np.asarray(taxes, dtype=np.float64)
+
+    if (taxes < 0).any():
+        raise ValueError('tax must be nonnegative')
+
+    (bounds, bases, marginal) = breakpoints(schedule, rates)
+
+    # The first bracket whose tax reaches each amount. Brackets taxed at 0 owe
+    # the same tax throughout, so the least income owing it is their bound.
+    idx = np.searchsorted(bases[1:], taxes, side='left')
+    rate = marginal[idx]
+
+    if ((rate == 0) & (taxes > bases[idx])).any():
+        raise ValueError('tax exceeds any owed under the schedule')
+
+    return bounds[idx] + np.divide(taxes - bases[idx], rate, out=np.zeros_like(taxes), where=rate > 0)
+
+# Compiled form of a schedule for computing tax in whole cents. `bounds` holds
+# the lower bound of each bracket in cents and `rates` each marginal rate in
+# basis points, so the tax on any income in cents is a whole number of
+# hundredths of a basis point of a cent. `bases` holds the tax owed up to each
+# bound in those units, so no rounding happens until the tax is truncated to
+# whole cents.
+CentsSchedule = namedtuple('CentsSchedule', ['bounds', 'bases', 'rates'])
+
+# Rates are given to the basis point
+_BASIS = 10_000
+
+def basisPoints(rate):
+    """
+    basisPoints converts the marginal rate `rate` to a whole number of basis
+    points.
+
+    >>> [basisPoints(r) for r in rateSchedule('MD', 2025)[1][:4]]
+    [200, 300, 400, 475]
+
+    >>> basisPoints(0.12345)
+    Traceback (most recent call last):
+        ...
+    ValueError: rate 0.12345 is not a whole number of basis points
+    """
+    bp = round(rate * _BASIS)
+
+    if abs(bp - rate * _BASIS) > 1e-6:
+        raise ValueError(f'rate {rate} is not a whole number of basis points')
+
+    return bp
+
+def _compute_cents_schedule(schedule, rates):
+    taxtable = _taxtable(schedule, rates)
+
+    bounds = [round(b * 100) for b in taxtable.bounds]
+    marginal = [basisPoints(r) for r in taxtable.rates]
+
+    bases = [0]
+    for i in range(1, len(bounds)):
+        bases.append(bases[-1] + (bounds[i] - bounds[i-1]) * marginal[i-1])
+
+    return CentsSchedule(tuple(bounds), tuple(bases), tuple(marginal))
+
+@lru_cache(maxsize=None)
+def _compileCents(schedule, rates):
+    return _compute_cents_schedule(schedule, rates)
+
+# Accept either a compiled schedule in cents or anything `_taxtable` accepts
+def _centstable(schedule, rates):
+    if isinstance(schedule, CentsSchedule):
+        return schedule
+
+    if schedule is None:
+        return compiledCentsSchedule()
+
+    if isinstance(schedule, TaxSchedule):
+        return _compileCents(schedule, ())
+
+    if rates is None:
+        rates = rateSchedule()[1]
+
+    return _compileCents(tuple(schedule), tuple(rates))
+
+@lru_cache(maxsize=None)
+def compiledCentsSchedule(jurisdiction='federal', year=2025, status='S'):
+    """
+    compiledCentsSchedule returns the schedule of `jurisdiction` for `year` and
+    the filing status `status` compiled for `figureTaxCents`.
+
+    >>> compiledCentsSchedule('MD', 2025).bases[:4]
+    (0, 20000000, 50000000, 90000000)
+    """
+    return _compute_cents_schedule(*rateSchedule(jurisdiction, year, status))
+
+def figureTaxCents(cents, schedule=None, rates=None):
+    """
+    figureTaxCents computes the tax on `cents` of income by applying the
+    `schedule`, exactly, in integer arithmetic. The tax is truncated to whole
+    cents once, at the end.
+
+    Input:
+        cents (int): Total taxable income in cents
+
+        schedule (List(float) | TaxSchedule | CentsSchedule): The upper bounds
+        of each tax bracket, or a compiled schedule. Default is the 2025 federal
+        schedule of a single filer.
+
+        rates (List(float)): The marginal rate of each bracket. Ignored when
+        `schedule` is compiled. Default is the 2025 federal rates of a single
+        filer.
+
+    Output:
+        The tax on the provided income in whole cents.
+
+    Raises:
+        - ValueError if income is negative
+
+    >>> figureTaxCents(0, [])
+    0
+
+    >>> figureTaxCents(11926_00)
+    119262
+
+    >>> figureTaxCents(147790_00)
+    2831660
+
+    >>> figureTaxCents(139819_00, [11600, 47150, 100525, 191950, 243735])
+    2659906
+
+    >>> figureTaxCents(10_00, compiledCentsSchedule('MD', 2025))
+    20
+
+    >>> figureTaxCents(-1)
+    Traceback (most recent call last):
+        ...
+    ValueError: income must be nonnegative
+    """
+    if cents < 0:
+        raise ValueError('income must be nonnegative')
+
+    taxtable = _centstable(schedule, rates)
+
+    # Supremum. Income exactly on a bound is taxed in the lower bracket.
+    i = bisect_left(taxtable.bounds, cents, 1) - 1
+
+    return (taxtable.bases[i] + (cents - taxtable.bounds[i]) * taxtable.rates[i]) // _BASIS
+
+def figureTaxCentsBatch(cents, schedule=None, rates=None):
+    """
+    figureTaxCentsBatch computes the tax on each element of `cents` exactly, as
+    `figureTaxCents` does, with one `searchsorted` over the bracket bounds in
+    place of a Python loop per income.
+
+    Input:
+        cents (array_like): Taxable incomes in cents
+
+        schedule (List(float) | TaxSchedule | CentsSchedule): The upper bounds
+        of each tax bracket, or a compiled schedule. Default is the 2025 federal
+        schedule of a single filer.
+
+        rates (List(float)): The marginal rate of each bracket. Ignored when
+        `schedule` is compiled. Default is the 2025 federal rates of a single
+        filer.
+
+    Output:
+        An int64 array of the tax on each income in whole cents.
+
+    Raises:
+        - ValueError if any income is negative
+
+    >>> figureTaxCentsBatch([0, 11926_00, 147790_00]).tolist()
+    [0, 119262, 2831660]
+
+    >>> figureTaxCentsBatch([10_00], compiledCentsSchedule('MD', 2025)).tolist()
+    [20]
+
+    >>> figureTaxCentsBatch([-1, 12345])
+    Traceback (most recent call last):
+        ...
+    ValueError: income must be nonnegative
+    """
+    import numpy as np
+
+    cents = np.asarray(cents, dtype=np.int64)
+
+    if (cents < 0).any():
+        raise ValueError('income must be nonnegative')
+
+    taxtable = _centstable(schedule, rates)
+    bounds = np.asarray(taxtable.bounds, dtype=np.int64)
+
+    # Income exactly on a bound is taxed in the lower bracket
+    idx = np.searchsorted(bounds[1:], cents, side='left')
+
+    bases = np.asarray(taxtable.bases, dtype=np.int64)[idx]
+
+    return (bases + (cents - bounds[idx]) * np.asarray(taxtable.rates, dtype=np.int64)[idx]) // _BASIS
+
+# Several schedules stacked over the union of their bracket bounds, e.g. the
+# federal, state and local taxes of one residence. `bounds` holds the lower
+# bound of each segment between any two bounds of any schedule, and row j of
+# `bases` and `rates` the tax owed up to each segment and the marginal rate
+# within it under the schedule `names[j]`. Every schedule is linear within a
+# segment, so one search over `bounds` finds the bracket of all of them.
+StackedSchedule = namedtuple('StackedSchedule', ['names', 'bounds', 'bases', 'rates'])
+
+def _stack(names, taxtables):
+    import numpy as np
+
+    bounds = sorted(set(b for t in taxtables for b in t.bounds))
+    bases = []
+    rates = []
+
+    for t in taxtables:
+        # The bracket of each segment. Income on a bound is taxed in the lower
+        # bracket, so a segment belongs to the last bracket starting at or
+        # below its lower bound.
+        brackets = [bisect_right(t.bounds, b) - 1 for b in bounds]
+
+        bases.append([t.bases[i] + (b - t.bounds[i]) * t.rates[i] for b, i in zip(bounds, brackets)])
+        rates.append([t.rates[i] for i in brackets])
+
+    return StackedSchedule(tuple(names), np.asarray(bounds), np.asarray(bases), np.asarray(rates))
+
+@lru_cache(maxsize=None)
+def _compileStack(jurisdictions, year, status, local):
+    taxtables = [compiledSchedule(j, year, status) for j in jurisdictions]
+    names = jurisdictions
+
+    if local is not None:
+        taxtables.append(TaxSchedule((0,), (0.0,), (local,)))
+        names += ('local',)
+
+    return _stack(names, taxtables)
+
+def compiledStack(jurisdictions=('federal', 'MD'), year=2025, status='S', local=None):
+    """
+    compiledStack stacks the schedules of `jurisdictions` for `year` and the
+    filing status `status` for `figureTaxStacked`, along with a flat `local`
+    rate named 'local' if one is given. Each stack is only compiled once.
+
+    >>> compiledStack(('federal', 'MD'), local=0.032).names
+    ('federal', 'MD', 'local')
+
+    >>> compiledStack(['federal', 'MD']) is compiledStack(('federal', 'MD'))
+    True
+    """
+    return _compileStack(tuple(jurisdictions), year, status, local)
+
+@lru_cache(maxsize=None)
+def _compileCentsStack(jurisdictions, year, status, local):
+    taxtables = [compiledCentsSchedule(j, year, status) for j in jurisdictions]
+    names = jurisdictions
+
+    if local is not None:
+        taxtables.append(CentsSchedule((0,), (0,), (basisPoints(local),)))
+        names += ('local',)
+
+    return _stack(names, taxtables)
+
+def compiledCentsStack(jurisdictions=('federal', 'MD'), year=2025, status='S', local=None):
+    """
+    compiledCentsStack stacks the schedules of `jurisdictions` as
+    `compiledStack` does, compiled for `figureTaxCentsStacked`.
+
+    >>> compiledCentsStack(['federal'], local=0.032).names
+    ('federal', 'local')
+    """
+    return _compileCentsStack(tuple(jurisdictions), year, status, local)
+
+def figureTaxStacked(incomes, stack=None):
+    """
+    figureTaxStacked computes the tax on each element of `incomes` under every
+    schedule of `stack` in one pass. The segment of each income is searched for
+    once for all schedules, and the tax under each is read from the same
+    segment.
+
+    Input:
+        incomes (array_like): Taxable incomes
+        stack (StackedSchedule): Schedules compiled by `compiledStack`. Default
+        is the 2025 federal and Maryland schedules of a single filer.
+
+    Output:
+        A tuple of a dictionary mapping the name of each schedule to a float64
+        array of the tax on each income under it, and an array of the total
+        tax on each income. Each tax equals `figureTaxBatch` under its schedule
+        to within rounding.
+
+    Raises:
+        - ValueError if any income is negative
+
+    >>> (taxes, total) = figureTaxStacked([0, 50000], compiledStack(local=0.032))
+    >>> {name: t.round(2).tolist() for name, t in taxes.items()}
+    {'federal': [0.0, 5914.0], 'MD': [0.0, 2322.5], 'local': [0.0, 1600.0]}
+    >>> total.round(2).tolist()
+    [0.0, 9836.5]
+    """
+    import numpy as np
+
+    incomes = np.asarray(incomes, dtype=np.float64)
+
+    if (incomes < 0).any():
+        raise ValueError('income must be nonnegative')
+
+    stack = stack or compiledStack()
+    idx = np.searchsorted(stack.bounds[1:], incomes, side='left')
+
+    offset = incomes - stack.bounds[idx]
+
+    # Gathering a row at a time is faster than gathering every row at once
+    taxes = [bases[idx] + offset * rates[idx] for bases, rates in zip(stack.bases, stack.rates)]
+
+    return (dict(zip(stack.names, taxes)), sum(taxes))
+
+def figureTaxCentsStacked(cents, stack=None):
+    """
+    figureTaxCentsStacked computes the tax on each element of `cents` under
+    every schedule of `stack` in one pass, exactly, as `figureTaxStacked` does
+    in floating point. The tax under each schedule is truncated to whole cents
+    and equals `figureTaxCentsBatch` under it.
+
+    Input:
+        cents (array_like): Taxable incomes in cents
+        stack (StackedSchedule): Schedules compiled by `compiledCentsStack`.
+        Default is the 2025 federal and Maryland schedules of a single filer.
+
+    Output:
+        A tuple of a dictionary mapping the name of each schedule to an int64
+        array of the tax on each income under it, and an array of the total
+        tax on each income, in whole cents.
+
+    Raises:
+        - ValueError if any income is negative
+
+    >>> (taxes, total) = figureTaxCentsStacked([10_00, 11926_00], compiledCentsStack(local=0.032))
+    >>> {name: t.tolist() for name, t in taxes.items()}, total.tolist()
+    ({'federal': [100, 119262], 'MD': [20, 51398], 'local': [32, 38163]}, [152, 208823])
+    """
+    import numpy as np
+
+    cents = np.asarray(cents, dtype=np.int64)
+
+    if (cents < 0).any():
+        raise ValueError('income must be nonnegative')
+
+    stack = stack or compiledCentsStack()
+    idx = np.searchsorted(stack.bounds[1:], cents, side='left')
+
+    offset = cents - stack.bounds[idx]
+
+    taxes = [(bases[idx] + offset * rates[idx]) // _BASIS for bases, rates in zip(stack.bases, stack.rates)]
+
+    return (dict(zip(stack.names, taxes)), sum(taxes))
 
 if __name__ == "__main__":
-    income = input('Please enter your taxable income: ')
+    parser = argparse.ArgumentParser(description='Compute the tax on taxable income under each jurisdiction taxing it')
+    parser.add_argument('income', type=float, nargs='?')
+    parser.add_argument('-s', '--status', default='S', choices=['S', 'HOH', 'MFJ', 'MFS', 'QSS'], help='The filing status. Default is S')
+    parser.add_argument('-y', '--year', type=int, default=2025, help='The tax year. Default is 2025')
+    parser.add_argument('-j', '--jurisdictions', nargs='+', default=['federal', 'MD'], help='The jurisdictions taxing the income. Default is federal MD')
+    parser.add_argument('-l', '--local', type=float, default=0.0320, help='The flat local rate. Default is 0.032')
+
+    args = parser.parse_args()
+    income = float(input('Please enter your taxable income: ')) if args.income is None else args.income
+
+    # A single income is figured without numpy, which takes longer to import
+    # than the rest of the program takes to run
+    taxes = { j: figureTax(income, compiledSchedule(j, args.year, args.status)) for j in args.jurisdictions }
+    taxes['local'] = income * args.local
 
-    mdRates = [0.02, 0.03, 0.04, 0.0475, 0.05, 0.0525, 0.055, 0.0575]
-    mdSchedule = [1000, 2000, 3000, 100_000, 125_000, 150_000, 250_000]
+    for (name, tax) in taxes.items():
+        print(f'{name}\t {tax:20.2f}')
 
-    print(f'federal\t {figureTax(float(income)):20}')
-    print(f'state\t {figureTax(float(income), mdtaxtable2025):20}')
-    print(f'local\t {(float(income) * 0.0320):20}')
+    print(f'total\t {sum(taxes.values()):20.2f}')
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+#coding:utf-8
+
+"""
+Parser Benchmark
+
+This program times parsing saved publication HTML with each parser backend,
+both over the whole publication and restricted to its sections, and reports the
+peak memory each parse allocates. A small saved publication is kept under
+fixtures/, and publications cached by the scraper serve as fixtures too, so any
+publication scraped once can be benchmarked offline.
+
+The fixture is small, so --scale repeats its chapters to stand in for a
+publication of realistic size. Scaled 150 times, to 0.5 MB, lxml parsed it
+1.3 to 1.7 times faster than html.parser over several runs. Restricting the
+parse to the sections gained nothing measurable in time or memory there, as a
+publication is almost all sections: it only skips the site header, navigation
+and footer around them.
+
+USAGE
+
+    ./bench.py [OPTIONS] [FILE...]
+
+    FILE is a saved publication. Default is fixtures/p-sample.html
+
+OPTIONS
+    -n, --repeat    The number of times each publication is parsed. Default is 3
+    -x, --scale     Repeat the chapters of each publication this many times.
+                    Default is 1
+    --cache         Benchmark every publication in this cache directory, e.g.
+                    the default cache of the scraper
+"""
+
+import os
+import copy
+import glob
+import time
+import argparse
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from pubscraper import parsePublication, _getTitle, _getSections
+from fetch import defaultCache
+
+# The publication parsed unless others are given
+defaultFixture = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'p-sample.html')
+
+# The parser backends that can be loaded here
+def _parsers():
+    parsers = ['html.parser']
+
+    try:
+        import lxml
+        parsers.append('lxml')
+    except ImportError:
+        pass
+
+    return parsers
+
+# Repeats the chapters of a publication `scale` times after the last of them
+def _scaled(html, scale):
+    soup = BeautifulSoup(html, 'html.parser')
+    chapters = soup.select('.chapter')
+
+    for _ in range(scale - 1):
+        for c in chapters:
+            chapters[-1].parent.append(copy.copy(c))
+
+    return str(soup)
+
+def bench(html, parser, restrict, repeat=3):
+    """
+    bench parses `html` `repeat` times and finds the title and sections of the
+    publication as the scraper does.
+
+    Output
+        A tuple of the fastest parse in seconds, the peak memory of one parse in
+        bytes and the number of sections found
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        soup = parsePublication(html, parser, restrict)
+        _getTitle(soup)
+        sections = sum(1 for _ in _getSections(soup))
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    parsePublication(html, parser, restrict)
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return (best, peak, sections)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark parsing saved IRS publications')
+    parser.add_argument('files', nargs='*')
+    parser.add_argument('-n', '--repeat', type=int, default=3, help='The number of times each publication is parsed. Default is 3')
+    parser.add_argument('-x', '--scale', type=int, default=1, help='Repeat the chapters of each publication this many times. Default is 1')
+    parser.add_argument('--cache', nargs='?', const=defaultCache,
+                        help=f'Benchmark every publication in this cache directory. Default is {defaultCache}')
+
+    args = parser.parse_args()
+
+    paths = list(args.files)
+    if args.cache:
+        paths += sorted(glob.glob(os.path.join(args.cache, '*.html')))
+
+    for path in paths or [defaultFixture]:
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+
+        if args.scale > 1:
+            html = _scaled(html, args.scale)
+
+        print(f'{path} ({len(html) / 1e6:.1f} MB)')
+        for backend in _parsers():
+            for restrict in (False, True):
+                (seconds, peak, sections) = bench(html, backend, restrict, args.repeat)
+                mode = 'sections' if restrict else 'full'
+
+                print(f'\t{backend:<12}{mode:<10}{seconds:8.3f} s{peak / 1e6:10.1f} MB\t{sections} sections')
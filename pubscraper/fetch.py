@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+#coding:utf-8
+
+"""
+Fetch
+
+Helpers for downloading IRS publications. Every request goes through one pooled
+session, and each page is kept in an on-disk cache along with the ETag and
+Last-Modified headers it was served with. A page already in the cache is only
+downloaded again if the server says it changed since.
+
+The cache is a directory holding, for each url, the page body and a small JSON
+file of its headers, both named after the SHA-256 hash of the url. A cache
+filled ahead of time serves as a fixture for running the scraper offline.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from taxstuff import instrument
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Where pages are cached unless told otherwise
+defaultCache = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'pubscraper')
+
+def makeSession(workers=8, retries=3):
+    """
+    makeSession creates a session keeping up to `workers` connections open per
+    host, retrying requests that fail with a server error. Once the retries are
+    spent the last response is returned, so its error is raised as any other.
+    """
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    return session
+
+# Paths of the cached body and headers of `url`
+def _cachePaths(cache, url):
+    key = hashlib.sha256(url.encode()).hexdigest()
+
+    return (os.path.join(cache, f'{key}.html'), os.path.join(cache, f'{key}.json'))
+
+def _readCache(cache, url):
+    (body, meta) = _cachePaths(cache, url)
+
+    # A missing or unreadable entry is a miss, so the page is fetched afresh
+    try:
+        with open(meta) as m, open(body, encoding='utf-8') as b:
+            (headers, text) = (json.load(m), b.read())
+    except (FileNotFoundError, json.JSONDecodeError, UnicodeDecodeError):
+        return (None, None)
+
+    if not isinstance(headers, dict) or not {'etag', 'last_modified'} <= headers.keys():
+        return (None, None)
+
+    return (headers, text)
+
+# Write `write` to a temporary file in `cache` and move it over `path` once
+# complete, so a reader never sees it half written
+def _replace(cache, path, write, **kwargs):
+    (fd, tmp) = tempfile.mkstemp(dir=cache, suffix='.tmp')
+
+    try:
+        with open(fd, 'w', **kwargs) as f:
+            write(f)
+
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def _writeCache(cache, url, headers, text):
+    (body, meta) = _cachePaths(cache, url)
+
+    os.makedirs(cache, exist_ok=True)
+
+    # Drop the headers before replacing the body and restore them after, so an
+    # interrupted write leaves a miss rather than a body with stale headers
+    try:
+        os.remove(meta)
+    except FileNotFoundError:
+        pass
+
+    _replace(cache, body, lambda b: b.write(text), encoding='utf-8')
+    _replace(cache, meta, lambda m: json.dump({ 'url': url, 'etag': headers.get('ETag'),
+                                                'last_modified': headers.get('Last-Modified') }, m))
+
+def fetch(url, session=None, cache=defaultCache, offline=False, timeout=30):
+    """
+    fetch returns the text of the page at `url`, revalidating any cached copy
+    with a conditional request.
+
+    Input
+        url (string): The url of the page
+        session (requests.Session): The session to send the request with.
+        Default is a new session
+        cache (string): The cache directory. None disables the cache
+        offline (bool): Serve the page from the cache without any request
+        timeout (float): Seconds to wait for the server
+
+    Output
+        The text of the page
+
+    Raises
+        - LookupError if `offline` is set and the page is not cached
+        - requests.HTTPError if the server responds with an error
+
+    A page served with an ETag is revalidated, and served from the cache once
+    the server answers 304 Not Modified
+
+    >>> import threading
+    >>> from http.server import HTTPServer, BaseHTTPRequestHandler
+    >>> class Page(BaseHTTPRequestHandler):
+    ...     def do_GET(self):
+    ...         fresh = self.headers['If-None-Match'] == '"v1"'
+    ...         self.send_response(304 if fresh else 200)
+    ...         self.send_header('ETag', '"v1"')
+    ...         self.end_headers()
+    ...         if not fresh:
+    ...             self.wfile.write(b'<h1>Publication 17</h1>')
+    ...     def log_message(self, *args):
+    ...         pass
+    >>> server = HTTPServer(('127.0.0.1', 0), Page)
+    >>> threading.Thread(target=server.serve_forever, daemon=True).start()
+    >>> url = f'http://127.0.0.1:{server.server_port}/p17.html'
+    >>> cache = tempfile.mkdtemp()
+    >>> stats = instrument.enable()
+    >>> fetch(url, cache=cache), stats.counters
+    ('<h1>Publication 17</h1>', {'bytes fetched': 23})
+    >>> fetch(url, cache=cache), stats.counters
+    ('<h1>Publication 17</h1>', {'bytes fetched': 23, 'cache hits': 1})
+
+    Headers that cannot be read are a miss, so the page is fetched again
+
+    >>> with open(_cachePaths(cache, url)[1], 'w') as m:
+    ...     _ = m.write('{"etag": ')
+    >>> fetch(url, cache=cache), stats.counters['bytes fetched']
+    ('<h1>Publication 17</h1>', 46)
+    >>> with open(_cachePaths(cache, url)[1], 'w') as m:
+    ...     _ = m.write('{}')
+    >>> fetch(url, cache=cache), stats.counters['bytes fetched']
+    ('<h1>Publication 17</h1>', 69)
+
+    Offline, a cached page is served without any request
+
+    >>> server.shutdown()
+    >>> fetch(url, cache=cache, offline=True), stats.counters['cache hits']
+    ('<h1>Publication 17</h1>', 2)
+    >>> fetch(url + '?v=2', cache=cache, offline=True)  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+        ...
+    LookupError: http://127.0.0.1:...?v=2 is not cached
+    >>> _ = instrument.disable()
+    >>> import shutil; shutil.rmtree(cache)
+    """
+    (meta, text) = _readCache(cache, url) if cache else (None, None)
+
+    if offline:
+        if text is None:
+            raise LookupError(f'{url} is not cached')
+
+        instrument.count('cache hits')
+        return text
+
+    headers = {}
+    if meta is not None:
+        if meta['etag']:
+            headers['If-None-Match'] = meta['etag']
+        if meta['last_modified']:
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    with instrument.stage('fetch'):
+        response = (session or requests).get(url, headers=headers, timeout=timeout)
+
+    if response.status_code == 304 and text is not None:
+        instrument.count('cache hits')
+        return text
+
+    response.raise_for_status()
+    instrument.count('bytes fetched', len(response.content))
+
+    if cache:
+        _writeCache(cache, url, response.headers, response.text)
+
+    return response.text
+
+def fetchAll(urls, cache=defaultCache, workers=8, offline=False, session=None):
+    """
+    fetchAll fetches every page of `urls` over at most `workers` concurrent
+    requests sharing one session.
+
+    Input
+        urls (Iterable(string)): The urls of the pages
+        cache (string): The cache directory. None disables the cache
+        workers (int): The number of requests in flight at once
+        offline (bool): Serve every page from the cache without any request
+        session (requests.Session): The session to send requests with. Default
+        is a session pooling `workers` connections
+
+    Output
+        The text of each page, in the order of `urls`
+    """
+    session = session or makeSession(workers)
+
+    with ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(lambda url: fetch(url, session, cache, offline), urls))
@@ -9,77 +9,225 @@ broken down by sections contained in the publication. The goal is to produce
 digestible, searchable files that can be read and edited as part of a personal
 library of tax information.
 
+Each publication directory holds a manifest of the hash of every section it was
+last written from. Sections that have not changed since are neither converted
+nor written again when the publication is scraped anew.
+
 USAGE
 
-    ./scraper.py [OPTIONS] [URL]
+    ./scraper.py [OPTIONS] URL...
 
 OPTIONS
-    -o, --out   The output directory of the files to be converted.
-    -c, --css   A CSS selector
+    -o, --out       The output directory of the files to be converted.
+    -c, --css       A CSS selector
+    -j, --jobs      The number of publications fetched at once. Default is 8
+    -p, --procs     The number of processes converting sections to markdown.
+                    Default is the number of CPUs
+    --cache         The directory publications are cached in
+    --offline       Read publications from the cache only
+    --parser        The HTML parser backend. Default is lxml when it is installed
+    --full          Parse the whole publication rather than only its sections
+    --force         Rewrite every section, even those that have not changed
+    --index         Bring the search index DB up to date with the output
+    --profile       Print the time spent fetching, parsing, converting and
+                    writing when done
+    --trace         Also write the stages, counters and a trace of every stage
+                    to TRACE
 """
 
 import os
+import json
+import hashlib
 import argparse
 
-import requests
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from markdownify import MarkdownConverter
+
+from taxstuff import instrument
+
+from fetch import defaultCache, fetchAll
+from search import openIndex, indexTree
 
-from bs4 import BeautifulSoup
-from markdownify import markdownify as md
+# lxml builds the tree faster than the parser of the standard library, 1.3 to
+# 1.7 times on a publication of 0.5 MB, so it is used whenever it is installed
+try:
+    import lxml
+    defaultParser = 'lxml'
+except ImportError:
+    defaultParser = 'html.parser'
 
+# Only the title page and the sections of a publication are ever read. Every
+# other top-level subtree is skipped without building it, which saves little on
+# a publication as the sections are nearly all of it.
+sectionStrainer = SoupStrainer(class_=['article', 'chapter', 'titlepage'])
+
+def parsePublication(html, parser=defaultParser, restrict=True):
+    """
+    parsePublication parses the HTML of a publication.
+
+    Input
+        html (string): The HTML of the publication
+        parser (string): The parser backend, e.g. lxml or html.parser
+        restrict (bool): Only build the title pages and sections of the
+        publication
+
+    Output
+        The BeautifulSoup of the publication
+    """
+    with instrument.stage('parse'):
+        return BeautifulSoup(html, parser, parse_only=sectionStrainer if restrict else None)
+
+# The title page of the book comes before any of its sections. A restricted
+# parse keeps it without the .book around it.
 def _getTitle(soup):
-    return soup.select_one('.book:first-child .titlepage').h1
+    return (soup.select_one('.book:first-child .titlepage') or soup.select_one('.titlepage')).h1
 
 
 # It's not clear why the 'introductory material' section of each publication is
 # separated out as an 'article'
+#
+# Sections are yielded in document order from a single walk of the tree. The
+# walk does not descend into a section, so it only visits the tags around them.
 def _getSections(soup):
-    return soup.select(':is(.article, .chapter)')
+    stack = [soup]
+
+    while stack:
+        tag = stack.pop()
+        classes = tag.get('class') or []
+
+        if 'article' in classes or 'chapter' in classes:
+            yield tag
+        else:
+            stack.extend(reversed([c for c in tag.contents if isinstance(c, Tag)]))
+
+# File names may not contain path separators
+def _filename(section):
+    return (section.h1 or section.h2).text.strip().replace('/', '-')
+
+# Converts sections to markdown, both in this process and in the workers of a pool
+_converter = MarkdownConverter()
 
+# Sections are converted straight from the parsed tree, or from their HTML in a
+# worker. Either way the newlines around the document are stripped, as
+# markdownify does for a whole page, so both write the same markdown.
+def _toMarkdown(section):
+    if isinstance(section, str):
+        section = BeautifulSoup(section, 'html.parser')
 
-def constructDocuments(title, soup, out=None):
+    return _converter.convert_soup(section).strip('\n')
+
+# The manifest of each publication directory, mapping the file name of each
+# section to the hash of the HTML it was written from
+manifestName = '.manifest.json'
+
+def _readManifest(root):
+    try:
+        with open(os.path.join(root, manifestName)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _writeManifest(root, manifest):
+    with open(os.path.join(root, manifestName), 'w') as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+
+def constructDocuments(title, soup, out=None, pool=None, force=False):
     """
     constructDocuments creates markdown documents under a directory [title] for
-    each section under [sections].
+    each section of the publication. Sections whose HTML is unchanged since the
+    manifest of the directory was written are skipped, and documents of
+    sections no longer in the publication are removed.
 
     Input
         title (string): The title of the document serving as the root directory
         soup (html): The beautiful soup pointer to the document
         out (string): Optionally specify an alternative output directory
+        pool (Executor): Optionally convert sections to markdown across the
+        workers of a process pool. Sections are otherwise converted straight
+        from the parsed tree without parsing them again
+        force (bool): Rewrite every section, even those that have not changed
+
+    Output
+        The paths of the documents written
     """
-    root = title.text
+    root = os.path.join(out or '.', title.text.strip().replace('/', '-'))
+    os.makedirs(root, exist_ok=True)
+
+    previous = _readManifest(root)
+
+    with instrument.stage('split'):
+        sections = list(_getSections(soup))
+        html = [str(s) for s in sections]
+        names = [_filename(s) for s in sections]
+        manifest = { name: hashlib.sha256(h.encode()).hexdigest() for name, h in zip(names, html) }
+
+    changed = [i for i, name in enumerate(names)
+               if force or previous.get(name) != manifest[name] or not os.path.exists(os.path.join(root, f'{name}.md'))]
 
-    if not os.path.exists(root):
-        os.mkdir(dirname)
+    instrument.count('sections written', len(changed))
+    instrument.count('sections unchanged', len(names) - len(changed))
 
-    for section in sections:
-        filename = (section.h1 or section.h2).text
+    # Conversion is lazy, so documents are only gathered up front when the
+    # time spent converting them is being measured apart from writing them
+    if pool is None:
+        documents = (_toMarkdown(sections[i]) for i in changed)
+    else:
+        documents = pool.map(_toMarkdown, [html[i] for i in changed], chunksize=4)
 
-        with open(f'{dirname}/{filename}.md', 'w+') as f:
-            f.write(md(str(section)))
+    if instrument.stats() is not None:
+        with instrument.stage('markdown'):
+            documents = list(documents)
+
+    paths = [os.path.join(root, f'{names[i]}.md') for i in changed]
+    with instrument.stage('write'):
+        for path, document in zip(paths, documents):
+            with open(path, 'w+') as f:
+                f.write(document)
+
+    for name in previous.keys() - manifest.keys():
+        try:
+            os.remove(os.path.join(root, f'{name}.md'))
+        except FileNotFoundError:
+            pass
+
+    _writeManifest(root, manifest)
+
+    return paths
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Break up an IRS publication into digestable markdown files')
-    parser.add_argument('url')
+    parser.add_argument('url', nargs='+')
     parser.add_argument('-o', '--out', help='The directory to output the publication files. Default is the current directory')
+    parser.add_argument('-j', '--jobs', type=int, default=8, help='The number of publications fetched at once. Default is 8')
+    parser.add_argument('-p', '--procs', type=int, help='The number of processes converting sections to markdown. Default is the number of CPUs')
+    parser.add_argument('--cache', default=defaultCache, help=f'The directory publications are cached in. Default is {defaultCache}')
+    parser.add_argument('--offline', action='store_true', help='Read publications from the cache only')
+    parser.add_argument('--parser', default=defaultParser, help=f'The HTML parser backend. Default is {defaultParser}')
+    parser.add_argument('--full', action='store_true', help='Parse the whole publication rather than only its sections')
+    parser.add_argument('--force', action='store_true', help='Rewrite every section, even those that have not changed')
+    parser.add_argument('--index', metavar='DB', help='Bring the search index DB up to date with the output')
+    parser.add_argument('--profile', action='store_true', help='Print the time spent in each stage when done')
+    parser.add_argument('--trace', help='Also write the stages, counters and a trace of every stage to TRACE')
 
     args = parser.parse_args()
 
-    # TODO: Allow a publication number as an optional argument
-    html = requests.get(args.url)
-    soup = BeautifulSoup(html.text, 'html.parser')
-
-    title = _getTitle(soup)
+    if args.profile or args.trace:
+        instrument.enable(trace=bool(args.trace))
 
-    for article in soup.select('.article'):
-        print(article.h1.text)
-        for section in article.select('.section .titlepage'):
-            print('\t', section.select_one(':is(h2, h4)').text)
+    # TODO: Allow a publication number as an optional argument
+    with ProcessPoolExecutor(args.procs) as pool:
+        for html in fetchAll(args.url, args.cache, args.jobs, args.offline):
+            soup = parsePublication(html, args.parser, not args.full)
 
-    # for h in soup.select(':is(h1, h2, h3, h4, h5, h6).title'):
-    #     print(h.parent.name)
-    #     print('\t', h.name, h['class'], h.text)
+            for path in constructDocuments(_getTitle(soup), soup, args.out, pool, args.force):
+                print(path)
 
-    # sections = _getSections(soup)
+    if args.index:
+        (updated, removed) = indexTree(openIndex(args.index), args.out or '.')
+        print(f'{updated} indexed, {removed} removed')
 
-    # constructDocuments(title, sections)
+    if instrument.stats() is not None:
+        instrument.report(instrument.stats(), args.trace)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+#coding:utf-8
+
+"""
+Publication Search
+
+This program keeps a full-text index of the markdown documents written by the
+scraper and searches it. The index is a SQLite database using FTS5, holding the
+publication, title and body of every section. Hits are ranked by BM25, with
+matches in the title of a section weighing more than matches in its body.
+
+Indexing is incremental: a document is only read again if its size or
+modification time changed since it was indexed, and documents that no longer
+exist are dropped from the index. Each document remembers the rowid of its
+section, so replacing or dropping it never scans the full-text table.
+
+USAGE
+
+    ./search.py [OPTIONS] index [DIR]
+    ./search.py [OPTIONS] query TERMS...
+
+    DIR is the output directory of the scraper. Default is the current directory
+    TERMS is an FTS5 query, e.g. "dependent care" OR childcare
+
+OPTIONS
+    -d, --db        The index database. Default is pubindex.db
+    -n, --limit     The number of hits to show. Default is 10
+"""
+
+import os
+import glob
+import sqlite3
+import argparse
+
+defaultDb = 'pubindex.db'
+
+def openIndex(path=defaultDb):
+    """
+    openIndex opens the index database at `path`, creating it if needed.
+    """
+    conn = sqlite3.connect(path)
+
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS documents (path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER, section INTEGER);
+        CREATE VIRTUAL TABLE IF NOT EXISTS sections USING fts5(
+            path UNINDEXED, publication, title, body, tokenize = 'porter unicode61'
+        );
+    ''')
+
+    return conn
+
+def indexTree(conn, out='.'):
+    """
+    indexTree brings the index up to date with the documents under `out`, one
+    directory per publication as written by constructDocuments.
+
+    Input
+        conn (sqlite3.Connection): The index, as returned by `openIndex`
+        out (string): The output directory of the scraper
+
+    Output
+        A tuple of the number of documents indexed and the number removed
+    """
+    indexed = { path: (mtime, size, section)
+                for (path, mtime, size, section) in conn.execute('SELECT path, mtime, size, section FROM documents') }
+    seen = set()
+    updated = 0
+
+    with conn:
+        for path in glob.glob(os.path.join(out, '*', '*.md')):
+            path = os.path.abspath(path)
+            stat = os.stat(path)
+            seen.add(path)
+
+            (mtime, size, section) = indexed.get(path, (None, None, None))
+            if (mtime, size) == (stat.st_mtime_ns, stat.st_size):
+                continue
+
+            with open(path) as f:
+                body = f.read()
+
+            publication = os.path.basename(os.path.dirname(path))
+            title = os.path.splitext(os.path.basename(path))[0]
+
+            if section is not None:
+                conn.execute('DELETE FROM sections WHERE rowid = ?', (section,))
+
+            section = conn.execute('INSERT INTO sections VALUES (?, ?, ?, ?)', (path, publication, title, body)).lastrowid
+            conn.execute('INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)', (path, stat.st_mtime_ns, stat.st_size, section))
+            updated += 1
+
+        # Only documents under `out` are checked, so an index spanning several
+        # output directories keeps the others
+        root = os.path.join(os.path.abspath(out), '')
+        removed = [path for path in indexed if path.startswith(root) and path not in seen]
+
+        for path in removed:
+            conn.execute('DELETE FROM sections WHERE rowid = ?', (indexed[path][2],))
+            conn.execute('DELETE FROM documents WHERE path = ?', (path,))
+
+    return (updated, len(removed))
+
+def search(conn, query, limit=10):
+    """
+    search finds the sections matching `query`, best first.
+
+    Input
+        conn (sqlite3.Connection): The index, as returned by `openIndex`
+        query (string): An FTS5 query
+        limit (int): The most hits to return
+
+    Output
+        A list of tuples of the path, publication, title and a snippet of the
+        body of each section hit
+
+    Raises
+        - ValueError if `query` is not a valid FTS5 query
+
+    >>> search(openIndex(':memory:'), "what's")
+    Traceback (most recent call last):
+        ...
+    ValueError: invalid query "what's": fts5: syntax error near "'"
+    """
+    try:
+        return conn.execute('''
+            SELECT path, publication, title, snippet(sections, 3, '[', ']', '...', 16)
+            FROM sections
+            WHERE sections MATCH ?
+            ORDER BY bm25(sections, 0.0, 2.0, 5.0, 1.0)
+            LIMIT ?
+        ''', (query, limit)).fetchall()
+    except sqlite3.OperationalError as e:
+        raise ValueError(f'invalid query "{query}": {e}') from None
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Index and search scraped IRS publications')
+    parser.add_argument('-d', '--db', default=defaultDb, help=f'The index database. Default is {defaultDb}')
+    parser.add_argument('-n', '--limit', type=int, default=10, help='The number of hits to show. Default is 10')
+
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('index', help='Index the documents written by the scraper').add_argument('dir', nargs='?', default='.')
+    commands.add_parser('query', help='Search the index').add_argument('terms', nargs='+')
+
+    args = parser.parse_args()
+    conn = openIndex(args.db)
+
+    if args.command == 'index':
+        (updated, removed) = indexTree(conn, args.dir)
+        print(f'{updated} indexed, {removed} removed')
+    else:
+        try:
+            hits = search(conn, ' '.join(args.terms), args.limit)
+        except ValueError as e:
+            parser.error(f'{e}. Quote terms holding punctuation, e.g. \'"what\'s"\'')
+
+        for (path, publication, title, snippet) in hits:
+            print(f'{publication} / {title}\n\t{path}\n\t{" ".join(snippet.split())}')
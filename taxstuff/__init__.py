@@ -0,0 +1,8 @@
+#coding:utf-8
+
+"""
+Tax Stuff
+
+The package holding the tools of this repository once installed, along with
+the `taxstuff` command running them. See `taxstuff.cli`.
+"""
@@ -0,0 +1,86 @@
+#coding:utf-8
+
+"""
+Tax Stuff
+
+One entry point for the tools of this repository. Each command runs one of the
+scripts as if it were run directly, with the directories it imports from on the
+path, so it works from any working directory. Nothing but the standard library
+is imported until a command is chosen, and then only what its script imports.
+
+Install it with `pip install .` to put `taxstuff` on the PATH. The scripts are
+installed inside the taxstuff package, laid out as in the checkout, so their
+directories never clash with other installed packages. An editable install
+runs them from the checkout itself. From a checkout, `python -m taxstuff` runs
+the same commands.
+
+The tools share the `taxstuff.instrument` module, so a script run directly
+rather than through a command needs the package installed or the root of the
+checkout on PYTHONPATH.
+
+USAGE
+
+    taxstuff COMMAND [ARGS...]
+
+COMMANDS
+    tax         Compute the tax on taxable income
+    w2          Populate forms W-2
+    1099-int    Populate forms 1099-INT
+    1040        Populate the basic information of a 1040
+    pipeline    Fill forms from a file of taxpayer records
+    parallel    Fill forms across a pool of processes
+    population  Generate a population of synthetic taxpayers
+    scrape      Break up IRS publications into markdown files
+    search      Index and search scraped publications
+    bench       Benchmark tax computation and form filling
+
+Each command takes the arguments of its script, e.g. `taxstuff w2 -h`.
+"""
+
+import os
+import sys
+import runpy
+import argparse
+
+# Installed, the scripts sit inside this package. In a checkout they sit beside
+# it.
+_here = os.path.dirname(os.path.realpath(__file__))
+root = _here if os.path.isdir(os.path.join(_here, 'formgen')) else os.path.dirname(_here)
+
+# The script run by each command and a summary of what it does
+commands = {
+        'tax': ('individual/taxcredits/tax_schedule.py', 'Compute the tax on taxable income'),
+        'w2': ('formgen/w2.py', 'Populate forms W-2'),
+        '1099-int': ('formgen/1099-int.py', 'Populate forms 1099-INT'),
+        '1040': ('formgen/basic-info.py', 'Populate the basic information of a 1040'),
+        'pipeline': ('formgen/pipeline.py', 'Fill forms from a file of taxpayer records'),
+        'parallel': ('formgen/parallel.py', 'Fill forms across a pool of processes'),
+        'population': ('formgen/population.py', 'Generate a population of synthetic taxpayers'),
+        'scrape': ('pubscraper/pubscraper.py', 'Break up IRS publications into markdown files'),
+        'search': ('pubscraper/search.py', 'Index and search scraped publications'),
+        'bench': ('formgen/bench.py', 'Benchmark tax computation and form filling'),
+        }
+
+def main(argv=None):
+    """
+    main runs the command named by the first of `argv` with the rest of them
+    as its arguments.
+    """
+    parser = argparse.ArgumentParser(prog='taxstuff', description='Tools for practicing and computing tax returns',
+                                     epilog='\n'.join(f'{c:<12}{summary}' for c, (_, summary) in commands.items()),
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=commands.keys(), metavar='COMMAND', help='The command to run, one of those below')
+    parser.add_argument('args', nargs=argparse.REMAINDER, metavar='ARGS', help='The arguments of the command')
+
+    args = parser.parse_args(argv)
+    script = os.path.join(root, commands[args.command][0])
+
+    if not os.path.isfile(script):
+        parser.exit(1, f'taxstuff: {args.command}: {script} is missing, reinstall tax-stuff\n')
+
+    # Scripts import their siblings and the packages under individual/, as
+    # they would when run from their own directory with individual/ on the path
+    sys.path[:0] = [os.path.dirname(script), os.path.join(root, 'individual')]
+    sys.argv = [script] + args.args
+
+    runpy.run_path(script, run_name='__main__')
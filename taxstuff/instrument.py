@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+#coding:utf-8
+
+"""
+Instrument
+
+Opt-in timers and counters for the stages of the form generators and the
+publication scraper. Code marks a stage with
+
+    with stage('write'):
+        ...
+
+and counts what it handled with `count('bytes written', n)`. Until `enable` is
+called both do nothing beyond a global lookup, so instrumented code runs at
+full speed by default.
+
+Once enabled, each stage accumulates its number of calls and total time, and
+may also record every call as an event of a trace in the Chrome trace event
+format, which can be opened in chrome://tracing or Perfetto.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+
+from contextlib import contextmanager, nullcontext
+
+# The stats being collected, or None while instrumentation is disabled
+_stats = None
+
+_disabled = nullcontext()
+
+class Stats:
+    """
+    Stats holds the time spent in each stage and the value of each counter.
+    """
+    def __init__(self, trace=False):
+        self.stages = {}
+        self.counters = {}
+        self.events = [] if trace else None
+        self._lock = threading.Lock()
+
+    # Locks cannot be pickled, so stats sent back from a worker process drop it
+    def __getstate__(self):
+        return { k: v for k, v in self.__dict__.items() if k != '_lock' }
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def add(self, name, start, end):
+        with self._lock:
+            (calls, total) = self.stages.get(name, (0, 0))
+            self.stages[name] = (calls + 1, total + end - start)
+
+            if self.events is not None:
+                self.events.append({ 'name': name, 'ph': 'X', 'ts': start / 1000, 'dur': (end - start) / 1000,
+                                     'pid': os.getpid(), 'tid': threading.get_ident() })
+
+    def count(self, name, n):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, other):
+        """
+        merge adds the stages, counters and events of `other`, e.g. as collected
+        by a worker process.
+        """
+        with self._lock:
+            for name, (calls, total) in other.stages.items():
+                (c, t) = self.stages.get(name, (0, 0))
+                self.stages[name] = (c + calls, t + total)
+
+            for name, n in other.counters.items():
+                self.counters[name] = self.counters.get(name, 0) + n
+
+            if self.events is not None and other.events is not None:
+                self.events.extend(other.events)
+
+    def summary(self):
+        """
+        summary formats the stages, slowest first, and the counters as a table.
+        """
+        lines = [f'{"stage":<32}{"calls":>10}{"total s":>12}{"mean ms":>12}']
+        for name, (calls, total) in sorted(self.stages.items(), key=lambda s: -s[1][1]):
+            lines.append(f'{name:<32}{calls:>10}{total / 1e9:>12.3f}{total / calls / 1e6:>12.3f}')
+
+        for name, n in sorted(self.counters.items()):
+            lines.append(f'{name:<32}{n:>10}')
+
+        return '\n'.join(lines)
+
+    def write(self, path):
+        """
+        write saves the stages and counters to `path` as JSON, along with the
+        trace events if they were recorded.
+        """
+        with open(path, 'w') as f:
+            json.dump({
+                'stages': { name: { 'calls': c, 'seconds': t / 1e9 } for name, (c, t) in self.stages.items() },
+                'counters': self.counters,
+                'traceEvents': self.events or [],
+                }, f)
+
+def enable(trace=False):
+    """
+    enable starts collecting stats, recording every call of every stage as a
+    trace event if `trace` is set, and returns the stats collected.
+    """
+    global _stats
+
+    _stats = Stats(trace)
+
+    return _stats
+
+def disable():
+    """
+    disable stops collecting stats and returns those collected, if any.
+    """
+    global _stats
+
+    (stats, _stats) = (_stats, None)
+
+    return stats
+
+def stats():
+    """
+    stats returns the stats being collected, or None while disabled.
+    """
+    return _stats
+
+def collect():
+    """
+    collect returns the stats collected so far, if any, and starts collecting
+    afresh. Worker processes use it to hand their stats back with each task.
+    """
+    stats = disable()
+
+    if stats is not None:
+        enable(stats.events is not None)
+
+    return stats
+
+def report(stats, path=None):
+    """
+    report prints the summary of `stats` to stderr and writes them to `path`,
+    if given.
+    """
+    print(stats.summary(), file=sys.stderr)
+
+    if path:
+        stats.write(path)
+
+@contextmanager
+def _timed(stats, name):
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        stats.add(name, start, time.perf_counter_ns())
+
+def stage(name):
+    """
+    stage returns a context manager timing the stage `name`.
+    """
+    return _disabled if _stats is None else _timed(_stats, name)
+
+def count(name, n=1):
+    """
+    count adds `n` to the counter `name`.
+    """
+    if _stats is not None:
+        _stats.count(name, n)